@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - reproducible timings for search and design-system generation
+
+Usage: python benchmark.py [--scales 1,10,100] [--repeat 5] [--output results.json]
+       python benchmark.py --compare before.json after.json
+
+Every scale runs against a synthetic corpus in a temporary directory: each
+shipped CSV (stacks included) with its data rows repeated N times, so the
+shipped data and the .cache/ index store are never touched. Runs fully
+offline and uses only the standard library (timeit over perf_counter).
+
+Measured per scale:
+  cold_start       fresh interpreter: import + first query, without and with the on-disk index cache
+  warm_query       one auto-detected query with hot indexes (result cache cleared)
+  cached_query     the same query answered from the result cache
+  domains          one query per CSV_CONFIG domain
+  stacks           one query per stack
+  design_system    full generate() with the memo cleared, then memoized, plus the
+                   per-domain search timings reported by generate_timed()
+  persist          persist_design_system with pages: first write, then unchanged rewrite
+
+Timings are in milliseconds (min / median / mean over --repeat runs after one warm-up).
+--compare prints the median change per measurement between two result files.
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+import core
+import design_system
+import index_store
+from core import AVAILABLE_STACKS, CSV_CONFIG, clear_index_cache, clear_search_cache, search, search_stack
+from design_system import DesignSystemGenerator, persist_design_system
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_REPEAT = 5
+
+# Fixed workload so results are comparable between versions
+WARM_QUERY = "glassmorphism dark mode dashboard"
+DOMAIN_QUERIES = {
+    "style": "minimal clean glassmorphism",
+    "prompt": "dark mode neon cyberpunk",
+    "color": "fintech trustworthy blue",
+    "chart": "time series trend comparison",
+    "landing": "hero social proof pricing",
+    "product": "saas analytics dashboard",
+    "ux": "accessibility keyboard focus",
+    "typography": "elegant serif luxury",
+    "icons": "navigation menu arrow",
+    "react": "rerender memo suspense",
+    "web": "form validation error",
+}
+STACK_QUERY = "responsive layout form performance"
+DESIGN_QUERIES = ["saas analytics dashboard", "beauty spa wellness", "fintech crypto exchange"]
+PERSIST_PAGES = ["dashboard", "checkout", "settings", "pricing", "blog"]
+
+# Runs in a fresh interpreter: import cost plus the first (index-building) query
+_COLD_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import core
+imported = time.perf_counter()
+core.DATA_DIR = core.Path(sys.argv[2])
+core.search(sys.argv[3])
+done = time.perf_counter()
+print(json.dumps({"import": (imported - started) * 1000, "first_query": (done - imported) * 1000}))
+"""
+
+
+def build_corpus(source_dir: Path, target_dir: Path, scale: int):
+    """Copy every CSV under source_dir with its data rows repeated scale times.
+
+    Copies after the first get fresh row numbers in the leading No/STT column.
+    """
+    for source in sorted(source_dir.rglob("*.csv")):
+        target = target_dir / source.relative_to(source_dir)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = list(reader)
+        numbered = bool(header) and header[0] in ("No", "STT")
+        with open(target, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for copy in range(scale):
+                for i, row in enumerate(rows, 1):
+                    if copy and numbered and row:
+                        row = [str(copy * len(rows) + i)] + row[1:]
+                    writer.writerow(row)
+
+
+def corpus_stats(data_dir: Path) -> dict:
+    """Row and byte totals of a corpus"""
+    rows = size = 0
+    for path in data_dir.rglob("*.csv"):
+        size += path.stat().st_size
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows += sum(1 for _ in csv.reader(f)) - 1
+    return {"files": sum(1 for _ in data_dir.rglob("*.csv")), "rows": rows, "bytes": size}
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Per-call timings of fn in milliseconds after one untimed warm-up; setup runs (untimed) before every call"""
+    if setup:
+        setup()
+    fn()
+    timer = timeit.Timer(fn, setup=setup or "pass", timer=time.perf_counter)
+    return summarize([t * 1000 for t in timer.repeat(repeat, 1)])
+
+
+def summarize(samples: list) -> dict:
+    """min/median/mean of millisecond samples"""
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "repeat": len(samples),
+    }
+
+
+def use_corpus(data_dir: Path, cache_dir: Path):
+    """Point search and generation at data_dir with a private index cache, dropping all warm state"""
+    core.DATA_DIR = data_dir
+    design_system.DATA_DIR = data_dir
+    index_store.CACHE_ENABLED = True
+    index_store.CACHE_DIR = cache_dir
+    clear_index_cache()
+    clear_search_cache()
+    DesignSystemGenerator._shared = None
+
+
+def bench_cold_start(data_dir: Path, cache_dir: Path, repeat: int) -> dict:
+    """Fresh-interpreter timings without and with a populated on-disk index cache"""
+    results = {}
+    for label, keep_cache in (("no_index_cache", False), ("index_cache", True)):
+        samples = {"process": [], "import": [], "first_query": []}
+        for _ in range(repeat):
+            if not keep_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            env = dict(os.environ, UIPRO_INDEX_CACHE=str(cache_dir))
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-c", _COLD_PROBE, str(SCRIPT_DIR), str(data_dir), WARM_QUERY],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            samples["process"].append((time.perf_counter() - started) * 1000)
+            probe = json.loads(proc.stdout)
+            samples["import"].append(probe["import"])
+            samples["first_query"].append(probe["first_query"])
+        results[label] = {name: summarize(values) for name, values in samples.items()}
+    return results
+
+
+def bench_scale(data_dir: Path, work_dir: Path, repeat: int, cold_repeat: int) -> dict:
+    """Every measurement against one corpus"""
+    cache_dir = work_dir / "index-cache"
+    result = {"corpus": corpus_stats(data_dir)}
+    if cold_repeat:
+        result["cold_start"] = bench_cold_start(data_dir, cache_dir, cold_repeat)
+
+    use_corpus(data_dir, cache_dir)
+    started = time.perf_counter()
+    search(WARM_QUERY)
+    result["first_query_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    result["warm_query"] = measure(lambda: search(WARM_QUERY), repeat, setup=clear_search_cache)
+    result["cached_query"] = measure(lambda: search(WARM_QUERY), repeat)
+    result["domains"] = {
+        domain: measure(lambda q=query, d=domain: search(q, d), repeat, setup=clear_search_cache)
+        for domain, query in DOMAIN_QUERIES.items() if domain in CSV_CONFIG
+    }
+    result["stacks"] = {
+        stack: measure(lambda s=stack: search_stack(STACK_QUERY, s), repeat, setup=clear_search_cache)
+        for stack in AVAILABLE_STACKS
+    }
+
+    generator = DesignSystemGenerator.shared()
+
+    def cold_generate():
+        generator.clear_cache()
+        clear_search_cache()
+
+    result["design_system"] = {
+        "generate": {
+            query: measure(lambda q=query: generator.generate(q), repeat, setup=cold_generate)
+            for query in DESIGN_QUERIES
+        },
+        "memoized": measure(lambda: generator.generate(DESIGN_QUERIES[0]), repeat),
+    }
+    samples = {}
+    for _ in range(repeat):
+        cold_generate()
+        _, timings = generator.generate_timed(DESIGN_QUERIES[0])
+        for name, ms in dict(timings["domains"], shared=timings["shared"]).items():
+            samples.setdefault(name, []).append(ms)
+    result["design_system"]["domains"] = {name: summarize(values) for name, values in samples.items()}
+
+    design = generator.generate(DESIGN_QUERIES[0], "Benchmark")
+    output_dir = work_dir / "persist"
+
+    def persist():
+        persist_design_system(design, output_dir=str(output_dir), pages=PERSIST_PAGES)
+
+    result["persist"] = {
+        "first_write": measure(persist, repeat, setup=lambda: shutil.rmtree(output_dir, ignore_errors=True)),
+        "unchanged": measure(persist, repeat),
+    }
+    return result
+
+
+def run(scales: list, repeat: int, cold_repeat: int) -> dict:
+    """Benchmark every scale in its own temporary corpus and return the JSON-ready report"""
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "bm25_backend": core.BM25_BACKEND,
+            "repeat": repeat,
+            "cold_repeat": cold_repeat,
+        },
+        "scales": {},
+    }
+    saved = (core.DATA_DIR, design_system.DATA_DIR, index_store.CACHE_ENABLED, index_store.CACHE_DIR)
+    source_dir = core.DATA_DIR
+    try:
+        for scale in scales:
+            with tempfile.TemporaryDirectory(prefix=f"uipro-bench-{scale}x-") as tmp:
+                work_dir = Path(tmp)
+                data_dir = work_dir / "data"
+                build_corpus(source_dir, data_dir, scale)
+                print(f"Benchmarking {scale}x corpus...", file=sys.stderr)
+                report["scales"][f"{scale}x"] = bench_scale(data_dir, work_dir, repeat, cold_repeat)
+    finally:
+        core.DATA_DIR, design_system.DATA_DIR, index_store.CACHE_ENABLED, index_store.CACHE_DIR = saved
+        clear_index_cache()
+        clear_search_cache()
+        DesignSystemGenerator._shared = None
+    return report
+
+
+def _medians(node, path=()):
+    """Flatten a report into {measurement path: median_ms}"""
+    if isinstance(node, dict):
+        if "median_ms" in node:
+            yield "/".join(path), node["median_ms"]
+            return
+        for key, value in node.items():
+            if key not in ("meta", "corpus"):
+                yield from _medians(value, path + (key,))
+
+
+def compare(before: dict, after: dict):
+    """Print the median change of every measurement present in both reports"""
+    old = dict(_medians(before))
+    for name, new_ms in _medians(after):
+        if name not in old:
+            continue
+        old_ms = old[name]
+        change = (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+        print(f"{change:+8.1f}%  {old_ms:>10.3f} -> {new_ms:>10.3f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmark")
+    parser.add_argument("--scales", type=str, default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated corpus multipliers (default: 1,10,100)")
+    parser.add_argument("--repeat", "-r", type=int, default=DEFAULT_REPEAT, help="Timed runs per measurement (default: 5)")
+    parser.add_argument("--cold-repeat", type=int, default=3, help="Fresh-interpreter runs per cold-start case (0 skips them)")
+    parser.add_argument("--output", "-o", type=str, default=None, help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_before, open(args.compare[1], encoding="utf-8") as f_after:
+            compare(json.load(f_before), json.load(f_after))
+        raise SystemExit(0)
+
+    try:
+        scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    except ValueError:
+        parser.error("--scales must be comma-separated integers")
+    if not scales or min(scales) < 1 or args.repeat < 1:
+        parser.error("--scales and --repeat must be positive")
+
+    report = run(scales, args.repeat, max(args.cold_repeat, 0))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
@@ -5,14 +5,30 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import heapq
+import os
 import re
+import sys
+import threading
+import time
+from array import array
 from pathlib import Path
-from math import log
-from collections import defaultdict
+from math import fsum, log
+from collections import OrderedDict, defaultdict
+
+import index_store
+
+# Optional: only the vectorized BM25 backend needs NumPy, imported on first use (see _load_numpy)
+np = None
+_NUMPY_MISSING = False
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
 MAX_RESULTS = 3
+# "python" (default) or "numpy" for the vectorized scorer; numpy falls back to python if unavailable
+BM25_BACKEND = os.environ.get("UIPRO_BM25_BACKEND", "python")
+# Max cached (domain, normalized query, max_results) results; 0 disables the result cache
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE", "1024"))
 
 CSV_CONFIG = {
     "style": {
@@ -95,127 +111,1051 @@ _STACK_COLS = {
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Keyword prior for detect_domain (substring matches on the lowercased query)
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+# Common queries and the domain they must auto-detect to (see check_domain_detection)
+DOMAIN_DETECTION_CASES = {
+    "glassmorphism": "style",
+    "minimalism": "style",
+    "brutalism": "style",
+    "neumorphism": "style",
+    "dark mode": "style",
+    "cyberpunk neon": "style",
+    "bento grid": "style",
+    "saas dashboard": "product",
+    "ecommerce": "product",
+    "healthcare app": "product",
+    "crypto exchange": "product",
+    "fintech trustworthy blue": "product",
+    "lucide icons": "icons",
+    "svg icon": "icons",
+    "heading font": "typography",
+    "serif typography": "typography",
+    "color palette for fintech": "color",
+    "landing page hero": "landing",
+    "pricing section": "landing",
+    "hero section cta": "landing",
+    "bar chart": "chart",
+    "pie chart comparison": "chart",
+    "trend line graph": "chart",
+    "dashboard chart": "chart",
+    "accessibility keyboard": "ux",
+    "touch targets mobile": "ux",
+    "navigation menu arrow": "ux",
+    "skeleton loading": "ux",
+    "tailwind css variables": "prompt",
+    "react suspense": "react",
+    "nextjs server component": "react",
+    "rerender memo": "react",
+    "react form": "react",
+    "form validation": "web",
+    "aria labels": "web",
+    "focus outline": "web",
+}
+
+
+def _load_numpy():
+    """Import NumPy into np on first call; False when it is not installed"""
+    global np, _NUMPY_MISSING
+    if np is None and not _NUMPY_MISSING:
+        try:
+            import numpy
+        except ImportError:
+            _NUMPY_MISSING = True
+        else:
+            np = numpy
+    return np is not None
+
 
 # ============ BM25 IMPLEMENTATION ============
+# Equivalent to replacing punctuation with spaces, splitting and keeping words longer than 2 chars
+_TOKEN_RE = re.compile(r'\w{3,}')
+
+
+def tokenize(text):
+    """Lowercase, split, remove punctuation, filter short words"""
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class Vocabulary:
+    """Interned term <-> dense integer id mapping shared by documents and queries"""
+
+    def __init__(self, terms=()):
+        self.terms = []
+        self.ids = {}
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term):
+        """Return the id of term, assigning the next free id to new terms"""
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(sys.intern(term))
+        return term_id
+
+    def encode(self, tokens):
+        """Document tokens -> compact term-id sequence, growing the vocabulary"""
+        add = self.add
+        return array('I', [add(token) for token in tokens])
+
+    def lookup(self, tokens):
+        """Query tokens -> ids of known terms, in query order (unknown terms cannot score)"""
+        ids = self.ids
+        return [ids[token] for token in tokens if token in ids]
+
+
+# Relative slack on score upper bounds so float rounding never prunes a true top-k hit
+_BOUND_SLACK = 1e-9
+# Max dense score cells (queries x documents) per vectorized batch
+_BATCH_CELLS = 1 << 22
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search.
 
-    def __init__(self, k1=1.5, b=0.75):
+    Documents are stored as term-id arrays over an interned Vocabulary, and the
+    inverted index is a flat term-major layout: the postings of term t are
+    post_docs/post_weights[post_offsets[t]:post_offsets[t + 1]], in doc order,
+    with the BM25 weight (idf and length norm included) precomputed.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, backend=None):
         self.k1 = k1
         self.b = b
+        backend = backend or BM25_BACKEND
+        if backend not in ("python", "numpy"):
+            raise ValueError(f"Unknown BM25 backend: {backend}")
+        self.backend = backend if backend == "python" or _load_numpy() else "python"
+        self._matrix = None
+        self.vocab = Vocabulary()
         self.corpus = []
-        self.doc_lengths = []
+        self.doc_lengths = array('I')
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
         self.N = 0
+        # Indexed by term id
+        self.doc_freqs = array('I')
+        self.idf = array('d')
+        self.max_weights = array('d')
+        self.post_offsets = array('I', [0])
+        self.post_docs = array('I')
+        self.post_weights = array('d')
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return tokenize(text)
 
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        self.vocab = Vocabulary()
+        self._fit_corpus([self.vocab.encode(tokenize(doc)) for doc in documents])
+
+    def _fit_corpus(self, corpus):
+        """Build the index from documents already encoded against self.vocab"""
+        self.corpus = corpus
         self.N = len(self.corpus)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.doc_lengths = array('I', [len(doc) for doc in self.corpus])
         self.avgdl = sum(self.doc_lengths) / self.N
 
+        # Per-document term frequencies, kept for the postings pass below
+        doc_tfs = []
+        doc_freqs = array('I', bytes(4 * len(self.vocab)))
         for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+            term_freqs = defaultdict(int)
+            for term_id in doc:
+                term_freqs[term_id] += 1
+            for term_id in term_freqs:
+                doc_freqs[term_id] += 1
+            doc_tfs.append(term_freqs)
+        self.doc_freqs = doc_freqs
+        self.idf = array('d', [log((self.N - freq + 0.5) / (freq + 0.5) + 1) for freq in doc_freqs])
+
+        self._build_postings(doc_tfs)
+
+    def _build_postings(self, doc_tfs):
+        """Precompute per-document term weights so queries only touch matching postings"""
+        offsets = array('I', [0])
+        for freq in self.doc_freqs:
+            offsets.append(offsets[-1] + freq)
+        cursor = array('I', offsets[:-1])
+        post_docs = array('I', bytes(4 * offsets[-1]))
+        post_weights = array('d', bytes(8 * offsets[-1]))
+
+        # avgdl is 0 when no document has a token (then no document has postings either)
+        avgdl = self.avgdl or 1.0
+        for idx, term_freqs in enumerate(doc_tfs):
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / avgdl)
+            for term_id, tf in term_freqs.items():
+                numerator = tf * (self.k1 + 1)
+                denominator = tf + norm
+                pos = cursor[term_id]
+                post_docs[pos] = idx
+                post_weights[pos] = self.idf[term_id] * numerator / denominator
+                cursor[term_id] = pos + 1
+
+        self.post_offsets = offsets
+        self.post_docs = post_docs
+        self.post_weights = post_weights
+        self._build_bounds()
+
+    def _build_bounds(self):
+        """Per-term maximum weight, used to skip documents that cannot reach the top k"""
+        offsets, weights = self.post_offsets, self.post_weights
+        self.max_weights = array('d', [max(weights[offsets[t]:offsets[t + 1]]) for t in range(len(self.vocab))])
+        self._matrix = None
+
+    def _query_ids(self, query):
+        """Raw query text or an already tokenized query (list of terms) -> known term ids"""
+        return self.vocab.lookup(query if isinstance(query, list) else tokenize(query))
+
+    def _csr(self):
+        """Term-document CSR matrix of BM25 weights (rows = term ids) as NumPy arrays.
+
+        Weights are kept in float64 so vectorized scores are bit-identical to
+        the pure-Python path and rankings (including ties) never diverge.
+        """
+        if self._matrix is None:
+            self._matrix = (
+                np.frombuffer(self.post_offsets, dtype=np.uint32).astype(np.int64),
+                np.frombuffer(self.post_docs, dtype=np.uint32).astype(np.int64),
+                np.frombuffer(self.post_weights, dtype=np.float64),
+            )
+        return self._matrix
+
+    def _gather(self, term_ids, offset=0):
+        """Doc indices and weights of every query-term row, in query order"""
+        if not term_ids:
+            return None, None
+        indptr, indices, data = self._csr()
+        docs = np.concatenate([indices[indptr[t]:indptr[t + 1]] for t in term_ids])
+        weights = np.concatenate([data[indptr[t]:indptr[t + 1]] for t in term_ids])
+        return docs + offset if offset else docs, weights
+
+    def _select(self, scores, k):
+        """Top k (doc_idx, score) pairs of a dense score vector, ties by doc order"""
+        cand = np.flatnonzero(scores > 0)
+        if len(cand) > k:
+            values = scores[cand]
+            kth = np.partition(values, len(values) - k)[len(values) - k]
+            cand = cand[values >= kth]
+        order = np.lexsort((cand, -scores[cand]))[:k]
+        return [(int(idx), float(scores[idx])) for idx in cand[order]]
+
+    def _top_k_numpy(self, term_ids, k):
+        docs, weights = self._gather(term_ids)
+        if docs is None:
+            return []
+        # bincount adds contributions in input (query) order, matching score()
+        return self._select(np.bincount(docs, weights=weights, minlength=self.N), k)
+
+    def top_k_batch(self, queries, k):
+        """top_k for many queries; the numpy backend scores them with one sparse product"""
+        if k <= 0:
+            return [[] for _ in queries]
+        if self.backend != "numpy" or self.N == 0:
+            return [self.top_k(query, k) for query in queries]
+
+        results = []
+        # Chunk so the dense (queries x documents) score block stays bounded
+        step = max(1, _BATCH_CELLS // self.N)
+        for start in range(0, len(queries), step):
+            chunk = queries[start:start + step]
+            all_docs, all_weights = [], []
+            for row, query in enumerate(chunk):
+                docs, weights = self._gather(self._query_ids(query), row * self.N)
+                if docs is not None:
+                    all_docs.append(docs)
+                    all_weights.append(weights)
+            if not all_docs:
+                results.extend([] for _ in chunk)
+                continue
+            scores = np.bincount(
+                np.concatenate(all_docs), weights=np.concatenate(all_weights), minlength=len(chunk) * self.N
+            ).reshape(len(chunk), self.N)
+            results.extend(self._select(scores[row], k) for row in range(len(chunk)))
+        return results
+
+    def top_k(self, query, k):
+        """Return the k best (doc_idx, score) pairs with score > 0, best first.
+
+        Document-at-a-time MaxScore: query terms are ordered by their score
+        upper bound, and once the heap is full the terms that together cannot
+        beat the current k-th score stop generating candidates.
+        """
+        if k <= 0:
+            return []
+        query_ids = self._query_ids(query)
+        if not query_ids:
+            return []
+        if self.backend == "numpy":
+            return self._top_k_numpy(query_ids, k)
+
+        counts = {}
+        for term_id in query_ids:
+            counts[term_id] = counts.get(term_id, 0) + 1
+
+        terms = sorted(counts, key=lambda t: self.max_weights[t] * counts[t])
+        offsets, post_docs, post_weights = self.post_offsets, self.post_docs, self.post_weights
+        ends = [offsets[t + 1] for t in terms]
+        ptrs = [offsets[t] for t in terms]
+        bounds = []
+        total = 0.0
+        for term_id in terms:
+            total += self.max_weights[term_id] * counts[term_id]
+            bounds.append(total)
+
+        n = len(terms)
+        heap = []  # (score, -doc_idx): the root is the current k-th best
+        threshold = 0.0
+        first_essential = 0
+
+        while True:
+            # Next candidate: lowest doc id still pending in an essential list
+            cand = -1
+            for i in range(first_essential, n):
+                if ptrs[i] < ends[i]:
+                    doc = post_docs[ptrs[i]]
+                    if cand < 0 or doc < cand:
+                        cand = doc
+            if cand < 0:
+                break
+
+            weights = {}
+            partial = 0.0
+            for i in range(first_essential, n):
+                p = ptrs[i]
+                if p < ends[i] and post_docs[p] == cand:
+                    weights[terms[i]] = post_weights[p]
+                    partial += post_weights[p] * counts[terms[i]]
+                    ptrs[i] = p + 1
+
+            # Non-essential terms can only add up to their combined bound
+            if first_essential and len(heap) == k:
+                if (partial + bounds[first_essential - 1]) * (1 + _BOUND_SLACK) <= threshold:
+                    continue
+            for i in range(first_essential):
+                p = ptrs[i]
+                while p < ends[i] and post_docs[p] < cand:
+                    p += 1
+                ptrs[i] = p
+                if p < ends[i] and post_docs[p] == cand:
+                    weights[terms[i]] = post_weights[p]
+
+            # Exact score, accumulated in query order like score()
+            score = 0.0
+            for term_id in query_ids:
+                weight = weights.get(term_id)
+                if weight is not None:
+                    score += weight
+
+            entry = (score, -cand)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            else:
+                continue
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first_essential < n and bounds[first_essential] * (1 + _BOUND_SLACK) <= threshold:
+                    first_essential += 1
+
+        return [(-neg_idx, score) for score, neg_idx in sorted(heap, reverse=True)]
+
+    def score_candidates(self, query):
+        """Score only documents containing at least one query term: {doc_idx: score}"""
+        offsets, post_docs, post_weights = self.post_offsets, self.post_docs, self.post_weights
+        scores = defaultdict(float)
+        for term_id in self._query_ids(query):
+            for pos in range(offsets[term_id], offsets[term_id + 1]):
+                scores[post_docs[pos]] += post_weights[pos]
+        return scores
 
     def score(self, query):
         """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        scores = self.score_candidates(query)
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        # Documents without any query term score 0 and keep their corpus order
+        ranked.extend((idx, 0) for idx in range(self.N) if idx not in scores)
+        return ranked
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+class MultiIndex(BM25):
+    """One inverted index over several fitted sources (one BM25 per CSV).
+
+    Documents are the sources' documents concatenated in source order, and
+    doc_source maps a document back to its source. Each posting carries two
+    weights: post_weights are fitted over the combined corpus, so scores are
+    comparable across sources, and local_weights are copied from the source's
+    own index, so per-source rankings match searching that source alone.
+    Without indexes it stays empty, to be filled from the disk cache.
+    """
+
+    def __init__(self, keys, indexes=None, k1=1.5, b=0.75, backend=None):
+        super().__init__(k1, b, backend)
+        self.keys = list(keys)
+        self.positions = {key: source for source, key in enumerate(self.keys)}
+        self.starts = array('I')
+        self.doc_source = array('H')
+        self.local_weights = array('d')
+        if indexes is not None:
+            self._fit_sources(indexes)
+
+    def _fit_sources(self, indexes):
+        """Fit the combined corpus of the source indexes and copy their local weights"""
+        corpus = []
+        for source, bm25 in enumerate(indexes):
+            self.starts.append(len(corpus))
+            terms = bm25.vocab.terms
+            corpus.extend(self.vocab.encode([terms[t] for t in doc]) for doc in bm25.corpus)
+            self.doc_source.extend([source] * bm25.N)
+        self.starts.append(len(corpus))
+        self._fit_corpus(corpus)
+
+        # Sources occupy consecutive doc ranges, so each global postings list is
+        # the concatenation of the sources' lists for that term, in source order
+        local = array('d', bytes(8 * len(self.post_docs)))
+        cursor = array('I', self.post_offsets[:-1])
+        for bm25 in indexes:
+            offsets, weights = bm25.post_offsets, bm25.post_weights
+            for term_id, global_id in enumerate(self.vocab.lookup(bm25.vocab.terms)):
+                start, end = offsets[term_id], offsets[term_id + 1]
+                pos = cursor[global_id]
+                local[pos:pos + end - start] = weights[start:end]
+                cursor[global_id] = pos + end - start
+        self.local_weights = local
+
+    def top_k_by_source(self, query, ks, depth=MAX_RESULTS):
+        """Score a query once over every source.
+
+        ks maps source key -> k. Returns ({key: [(doc_idx, score), ...]}, {key: strength}):
+        hits use source-local doc indices and rank exactly like that source's
+        top_k, and strength is the mean of a source's depth best combined-corpus
+        scores, which unlike a sum does not grow with the size of the CSV
+        (sources without matches are omitted).
+        """
+        query_ids = self._query_ids(query)
+        if not query_ids:
+            return {key: [] for key in ks}, {}
+        if self.backend == "numpy":
+            return self._top_k_by_source_numpy(query_ids, ks, depth)
+
+        offsets, post_docs = self.post_offsets, self.post_docs
+        local_weights, weights = self.local_weights, self.post_weights
+        ranked = defaultdict(float)
+        totals = defaultdict(float)
+        # Accumulated in query order, like BM25.score()
+        for term_id in query_ids:
+            for pos in range(offsets[term_id], offsets[term_id + 1]):
+                doc = post_docs[pos]
+                ranked[doc] += local_weights[pos]
+                totals[doc] += weights[pos]
+
+        per_source = defaultdict(list)
+        for doc, score in ranked.items():
+            per_source[self.doc_source[doc]].append((doc, score))
+        strength = {}
+        for source, docs in per_source.items():
+            strength[self.keys[source]] = fsum(heapq.nlargest(depth, (totals[doc] for doc, _ in docs))) / depth
+
+        hits = {}
+        for key, k in ks.items():
+            source = self.positions[key]
+            start = self.starts[source]
+            top = heapq.nsmallest(max(k, 0), per_source.get(source, ()), key=lambda x: (-x[1], x[0]))
+            hits[key] = [(doc - start, score) for doc, score in top]
+        return hits, strength
+
+    def _top_k_by_source_numpy(self, query_ids, ks, depth):
+        indptr, indices, data = self._csr()
+        local = np.frombuffer(self.local_weights, dtype=np.float64)
+        rows = [slice(indptr[t], indptr[t + 1]) for t in query_ids]
+        docs = np.concatenate([indices[row] for row in rows])
+        ranked = np.bincount(docs, weights=np.concatenate([local[row] for row in rows]), minlength=self.N)
+        totals = np.bincount(docs, weights=np.concatenate([data[row] for row in rows]), minlength=self.N)
+
+        strength = {}
+        for source, key in enumerate(self.keys):
+            scores = totals[self.starts[source]:self.starts[source + 1]]
+            if scores.any():
+                top = np.sort(scores)[::-1][:depth]
+                strength[key] = fsum(top[top > 0].tolist()) / depth
+        hits = {}
+        for key, k in ks.items():
+            source = self.positions[key]
+            scores = ranked[self.starts[source]:self.starts[source + 1]]
+            hits[key] = self._select(scores, k) if k > 0 else []
+        return hits, strength
+
+
+class RowTerms:
+    """Tokens of every cell of a CSV's rows, computed with its index for field-weighted reranking.
+
+    Cell c = row * len(fields) + field holds the terms
+    cell_terms[cell_offsets[c]:cell_offsets[c + 1]] (ids into terms); the
+    arrays are stored next to the BM25 index in the disk cache.
+    """
+
+    def __init__(self, data, fields, terms, cell_offsets, cell_terms):
+        self.data = data
+        self.fields = fields
+        self.terms = terms
+        self.cell_offsets = cell_offsets
+        self.cell_terms = cell_terms
+        self._cells = None
+
+    @classmethod
+    def build(cls, data, fields):
+        vocab = Vocabulary()
+        offsets, ids = array('I', [0]), array('I')
+        for row in data:
+            for field in fields:
+                ids.extend(vocab.encode(tokenize(row.get(field) or "")))
+                offsets.append(len(ids))
+        return cls(data, fields, vocab.terms, offsets, ids)
+
+    def cells(self):
+        """{cell text: frozenset of its tokens}, assembled from the stored arrays on first use"""
+        if self._cells is None:
+            terms, offsets, ids = self.terms, self.cell_offsets, self.cell_terms
+            cells = {}
+            cell = 0
+            for row in self.data:
+                for field in self.fields:
+                    text = str(row.get(field) or "")
+                    if text not in cells:
+                        cells[text] = frozenset([terms[t] for t in ids[offsets[cell]:offsets[cell + 1]]])
+                    cell += 1
+            self._cells = cells
+        return self._cells
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """Thread-safe bounded LRU of ranked results.
+
+    Entries remember the CSV signature they were computed from and are
+    dropped on lookup once the file changes.
+    """
 
-            scores.append((idx, score))
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    def get(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != signature:
+                del self._entries[key]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, signature, results):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (signature, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE)
+
+
+def _result_key(target, query, max_results):
+    """Cache key: same CSV/columns, same token multiset (order, case, punctuation ignored), same k"""
+    filepath, search_cols, output_cols = target
+    return (str(filepath), tuple(search_cols), tuple(output_cols), tuple(sorted(tokenize(query))), max_results)
+
+
+def search_cache_info():
+    """Hit/miss/eviction counters of the search result cache"""
+    return _RESULT_CACHE.info()
+
+
+def clear_search_cache():
+    """Drop all cached search results"""
+    _RESULT_CACHE.clear()
 
 
 # ============ SEARCH FUNCTIONS ============
+# (signature, rows, fitted BM25, RowTerms) keyed by (CSV path, search columns); rebuilt when the file changes
+_INDEX_CACHE = {}
+# {source keys: (source signatures, MultiIndex)}; see _get_multi_index()
+_MULTI_INDEXES = {}
+
+
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
     with open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
+def _file_signature(filepath):
+    """Cheap change detection for cached indexes"""
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _get_index(filepath, search_cols, signature=None):
+    """Return (rows, fitted BM25) for a CSV, reusing the cached index while the file is unchanged"""
+    key = (str(filepath), tuple(search_cols))
+    signature = signature or _file_signature(filepath)
+    cached = _INDEX_CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1], cached[2]
+
+    loaded = _load_stored_index(filepath, search_cols, signature)
+    if loaded is None:
+        loaded = _build_index(filepath, search_cols, signature)
+
+    _INDEX_CACHE[key] = (signature, *loaded)
+    return loaded[0], loaded[1]
+
+
+def _get_row_terms(filepath, search_cols):
+    """RowTerms of a CSV's rows, loaded or built along with its index"""
+    signature = _file_signature(filepath)
+    _get_index(filepath, search_cols, signature)
+    return _INDEX_CACHE[(str(filepath), tuple(search_cols))][3]
+
+
+def _index_sources(stacks=True):
+    """(CSV file name, search cols) of every domain (and stack), in CSV_CONFIG then STACK_CONFIG order"""
+    sources = [(cfg["file"], cfg["search_cols"]) for cfg in CSV_CONFIG.values()]
+    if stacks:
+        sources += [(cfg["file"], _STACK_COLS["search_cols"]) for cfg in STACK_CONFIG.values()]
+    return sources
+
+
+def _get_multi_index(sources=None, build=True, force=False):
+    """Return the MultiIndex over the existing CSVs among sources, rebuilt when any of them changes.
+
+    sources are (CSV file name, search cols) pairs, by default every domain and
+    stack; the index keys them like _INDEX_CACHE: (CSV path, search columns).
+    A fitted MultiIndex is kept in the on-disk cache like the per-CSV indexes.
+    With build=False, returns None rather than fitting one that is neither in
+    memory nor on disk; force=True refits it regardless.
+    """
+    keys, signatures = [], []
+    for filename, search_cols in (_index_sources() if sources is None else sources):
+        filepath = DATA_DIR / filename
+        key = (str(filepath), tuple(search_cols))
+        if key in keys:
+            continue
+        try:
+            signatures.append(_file_signature(filepath))
+        except OSError:
+            continue
+        keys.append(key)
+
+    state = tuple(zip(keys, signatures))
+    cached = None if force else _MULTI_INDEXES.get(tuple(keys))
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    multi = None if force else _load_stored_multi_index(state)
+    if multi is None:
+        if not build:
+            return None
+        indexes = [_get_index(Path(path), cols, sig)[1] for (path, cols), sig in state]
+        multi = MultiIndex(keys, indexes)
+        _store_multi_index(state, multi)
+    _MULTI_INDEXES[tuple(keys)] = (state, multi)
+    return multi
+
+
+def _documents(data, search_cols):
+    """Build documents from search columns"""
+    return [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+
+
+def _row_fields(data):
+    """Column names of parsed rows (without the overflow key of over-long rows)"""
+    fields = list(data[0].keys()) if data else []
+    return [field for field in fields if field is not None]
+
+
+def _build_index(filepath, search_cols, signature):
+    """Parse and fit a CSV and tokenize its cells, then write it to the on-disk cache"""
+    data = _load_csv(filepath)
+    bm25 = BM25()
+    bm25.fit(_documents(data, search_cols))
+    row_terms = RowTerms.build(data, _row_fields(data))
+    _store_index(filepath, search_cols, signature, data, bm25, row_terms)
+    return data, bm25, row_terms
+
+
+def _index_arrays(bm25):
+    """The arrays of a fitted index as stored on disk (documents concatenated into one corpus array)"""
+    corpus = array('I')
+    for doc in bm25.corpus:
+        corpus.extend(doc)
+    return {
+        "idf": bm25.idf,
+        "doc_freqs": bm25.doc_freqs,
+        "max_weights": bm25.max_weights,
+        "doc_lengths": bm25.doc_lengths,
+        "corpus": corpus,
+        "post_offsets": bm25.post_offsets,
+        "post_docs": bm25.post_docs,
+        "post_weights": bm25.post_weights,
+    }
+
+
+def _restore_index(bm25, header, arrays):
+    """Fill an empty BM25 from a cache file's header and arrays (ValueError if they disagree)"""
+    bm25.vocab = Vocabulary(header["terms"])
+    bm25.N = header["N"]
+    bm25.avgdl = header["avgdl"]
+    bm25.idf = arrays["idf"]
+    bm25.doc_freqs = arrays["doc_freqs"]
+    bm25.max_weights = arrays["max_weights"]
+    bm25.doc_lengths = arrays["doc_lengths"]
+    bm25.post_offsets = arrays["post_offsets"]
+    bm25.post_docs = arrays["post_docs"]
+    bm25.post_weights = arrays["post_weights"]
+
+    corpus_ids = arrays["corpus"]
+    if (len(bm25.doc_lengths) != bm25.N or sum(bm25.doc_lengths) != len(corpus_ids)
+            or len(bm25.post_offsets) != len(bm25.vocab) + 1
+            or bm25.post_offsets[-1] != len(bm25.post_docs) or len(bm25.post_weights) != len(bm25.post_docs)):
+        raise ValueError("inconsistent index file")
+    corpus, start = [], 0
+    for length in bm25.doc_lengths:
+        corpus.append(corpus_ids[start:start + length])
+        start += length
+    bm25.corpus = corpus
+
+
+def _store_index(filepath, search_cols, signature, data, bm25, row_terms, sha1=None):
+    """Persist a fitted index and its cell tokens as compact arrays in the on-disk cache"""
+    if not index_store.CACHE_ENABLED:
+        return
+    fields = row_terms.fields
+    header = {
+        "source": str(filepath),
+        "mtime_ns": signature[0],
+        "size": signature[1],
+        "sha1": sha1 or index_store.file_sha1(filepath),
+        "search_cols": list(search_cols),
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "N": bm25.N,
+        "avgdl": bm25.avgdl,
+        "terms": bm25.vocab.terms,
+        "fields": fields,
+        "rows": [[row.get(field) for field in fields] for row in data],
+        "cell_vocab": row_terms.terms,
+    }
+    arrays = dict(_index_arrays(bm25), cell_offsets=row_terms.cell_offsets, cell_terms=row_terms.cell_terms)
+    index_store.write_index(index_store.cache_path(filepath, search_cols), header, arrays)
+
+
+def _load_stored_index(filepath, search_cols, signature):
+    """Load (rows, BM25, RowTerms) from the disk cache if it still matches the CSV, else None.
+
+    Truncated, inconsistent or outdated cache files are misses, so the caller rebuilds.
+    """
+    if not index_store.CACHE_ENABLED:
+        return None
+    stored = index_store.read_header(index_store.cache_path(filepath, search_cols))
+    if stored is None:
+        return None
+    header, base, mapped = stored
+    try:
+        with mapped:
+            loaded = _stored_index(filepath, search_cols, signature, header, base, mapped)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+    if loaded is not None and (header["mtime_ns"], header["size"]) != signature:
+        # Refresh the stored signature so the next load skips hashing
+        _store_index(filepath, search_cols, signature, *loaded, header["sha1"])
+    return loaded
+
+
+def _stored_index(filepath, search_cols, signature, header, base, mapped):
+    """(rows, BM25, RowTerms) from a cache file's header and mapped payload; None if stale (raises if malformed)"""
+    if header.get("source") != str(filepath) or header.get("search_cols") != list(search_cols):
+        return None
+    if (header["mtime_ns"], header["size"]) != signature:
+        # Touched but possibly identical (checkout, copy): fall back to the content hash
+        if header["size"] != signature[1] or header["sha1"] != index_store.file_sha1(filepath):
+            return None
+
+    arrays = index_store.read_arrays(header, base, mapped)
+    fields = header["fields"]
+    data = [dict(zip(fields, values)) for values in header["rows"]]
+
+    bm25 = BM25(header["k1"], header["b"])
+    _restore_index(bm25, header, arrays)
+    row_terms = RowTerms(data, fields, header["cell_vocab"], arrays["cell_offsets"], arrays["cell_terms"])
+    if (len(data) != bm25.N or len(row_terms.cell_offsets) != len(data) * len(fields) + 1
+            or row_terms.cell_offsets[-1] != len(row_terms.cell_terms)
+            or max(row_terms.cell_terms, default=-1) >= len(row_terms.terms)):
+        raise ValueError("inconsistent index file")
+    return data, bm25, row_terms
+
+
+def _multi_cache_path(state):
+    return index_store.cache_path("unified", [[path, list(cols)] for (path, cols), _ in state])
+
+
+def _store_multi_index(state, multi):
+    """Persist a MultiIndex in the on-disk cache, tied to the signatures of its sources"""
+    if not index_store.CACHE_ENABLED:
+        return
+    header = {
+        "sources": [[path, list(cols), *signature] for (path, cols), signature in state],
+        "k1": multi.k1,
+        "b": multi.b,
+        "N": multi.N,
+        "avgdl": multi.avgdl,
+        "terms": multi.vocab.terms,
+    }
+    arrays = dict(_index_arrays(multi), local_weights=multi.local_weights,
+                  starts=multi.starts, doc_source=multi.doc_source)
+    index_store.write_index(_multi_cache_path(state), header, arrays)
+
+
+def _load_stored_multi_index(state):
+    """Load a MultiIndex from the disk cache if every source is unchanged, else None.
+
+    Sources are matched by signature only: a touched CSV means a refit, which
+    reuses the (content-hashed) per-CSV indexes.
+    """
+    if not index_store.CACHE_ENABLED:
+        return None
+    stored = index_store.read_header(_multi_cache_path(state))
+    if stored is None:
+        return None
+    header, base, mapped = stored
+    try:
+        with mapped:
+            if header.get("sources") != [[path, list(cols), *signature] for (path, cols), signature in state]:
+                return None
+            arrays = index_store.read_arrays(header, base, mapped)
+            multi = MultiIndex([key for key, _ in state], k1=header["k1"], b=header["b"])
+            _restore_index(multi, header, arrays)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    multi.local_weights = arrays["local_weights"]
+    multi.starts = arrays["starts"]
+    multi.doc_source = arrays["doc_source"]
+    if (len(multi.local_weights) != len(multi.post_docs) or len(multi.starts) != len(state) + 1
+            or multi.starts[-1] != multi.N or len(multi.doc_source) != multi.N):
+        return None
+    return multi
+
+
+def build_indexes(force=False):
+    """Compile every domain and stack CSV into the on-disk cache and load them into memory.
+
+    Returns {file: "built" | "cached" | "missing"}.
+    """
+    status = {}
+    for filename, search_cols in _index_sources():
+        filepath = DATA_DIR / filename
+        if not filepath.exists():
+            status[filename] = "missing"
+            continue
+        signature = _file_signature(filepath)
+        loaded = None if force else _load_stored_index(filepath, search_cols, signature)
+        status[filename] = "built" if loaded is None else "cached"
+        if loaded is None:
+            loaded = _build_index(filepath, search_cols, signature)
+        _INDEX_CACHE[(str(filepath), tuple(search_cols))] = (signature, *loaded)
+    if any(state != "missing" for state in status.values()):
+        _get_multi_index(force=force)
+        _get_multi_index(_index_sources(stacks=False), force=force)
+    return status
+
+
+def check_backend_parity(max_results=MAX_RESULTS):
+    """Compare python and numpy top-k rankings on every CSV_CONFIG domain.
+
+    Queries are each row's own search text plus every vocabulary term.
+    Returns a list of (domain, query) pairs whose rankings differ.
+    """
+    if not _load_numpy():
+        raise RuntimeError("NumPy is not installed; only the python backend is available")
+
+    mismatches = []
+    for domain, config in CSV_CONFIG.items():
+        filepath = DATA_DIR / config["file"]
+        if not filepath.exists():
+            continue
+        documents = _documents(_load_csv(filepath), config["search_cols"])
+        python_bm25 = BM25(backend="python")
+        python_bm25.fit(documents)
+        numpy_bm25 = BM25(backend="numpy")
+        numpy_bm25.fit(documents)
+
+        queries = documents + sorted(python_bm25.vocab.terms)
+        batched = numpy_bm25.top_k_batch(queries, max_results)
+        for query, batch_result in zip(queries, batched):
+            expected = python_bm25.top_k(query, max_results)
+            if numpy_bm25.top_k(query, max_results) != expected or batch_result != expected:
+                mismatches.append((domain, query))
+    return mismatches
+
+
+def clear_index_cache():
+    """Drop all in-memory indexes (they are reloaded lazily on the next search)"""
+    _INDEX_CACHE.clear()
+    _MULTI_INDEXES.clear()
+
+
 def _search_csv(filepath, search_cols, output_cols, query, max_results):
     """Core search function using BM25"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
+    signature = _file_signature(filepath)
+    key = _result_key((filepath, search_cols, output_cols), query, max_results)
+    results = _RESULT_CACHE.get(key, signature)
+    if results is None:
+        data, bm25 = _get_index(filepath, search_cols, signature)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+        # Top-k BM25 search over matching postings only (ties keep corpus order)
+        results = _rows_to_results(data, bm25.top_k(query, max_results), output_cols)
+        _RESULT_CACHE.put(key, signature, results)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    # Callers get their own row dicts so the cached ones stay pristine
+    return [dict(row) for row in results]
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
 
+def _rows_to_results(data, hits, output_cols):
+    """Project ranked (doc_idx, score) hits onto the output columns"""
+    results = []
+    for idx, score in hits:
+        row = data[idx]
+        results.append({col: row.get(col, "") for col in output_cols if col in row})
     return results
 
 
+def rerank(domain, rows, terms, field_weights, default_weight=1):
+    """Field-weighted priority rerank of a domain's result rows; returns [(score, row)] best first.
+
+    A term matches a field when every token of the term occurs in it. Each
+    term scores once per row: the weight of the first field in field_weights
+    matching it, else default_weight if any other single field of the row
+    matches it.
+    Fields are compared through the token sets tokenized with the domain's
+    index (see RowTerms), and ties keep the input (BM25) order.
+    """
+    config = CSV_CONFIG[domain]
+    cells = _get_row_terms(DATA_DIR / config["file"], config["search_cols"]).cells()
+
+    def tokens(value):
+        text = str(value)
+        found = cells.get(text)
+        # Values the index has not seen (rows built elsewhere) are tokenized on the spot
+        return found if found is not None else frozenset(tokenize(text))
+
+    # A term without tokens (too short) cannot match anything
+    term_sets = [term_set for term_set in map(frozenset, map(tokenize, terms)) if term_set]
+    weighted = list(field_weights.items())
+    scored = []
+    for row in rows:
+        fields = [(tokens(row.get(field, "")), weight) for field, weight in weighted]
+        everything = None
+        score = 0
+        for term_set in term_sets:
+            for field_tokens, weight in fields:
+                if term_set <= field_tokens:
+                    score += weight
+                    break
+            else:
+                if everything is None:
+                    everything = [tokens(value) for value in row.values()]
+                if any(term_set <= field_tokens for field_tokens in everything):
+                    score += default_weight
+        scored.append((score, row))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored
+
+
 def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
+    """Auto-detect the most relevant domain from query.
+
+    The domain with the most DOMAIN_KEYWORDS hits wins (the first listed on
+    ties). Queries without any keyword go to the domain with the strongest top
+    results in the unified index over the CSV_CONFIG domains (see
+    MultiIndex.top_k_by_source), or "style" when nothing matches at all.
+    """
     query_lower = query.lower()
+    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in DOMAIN_KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    if scores[best] > 0:
+        return best
 
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    _, strength = _get_multi_index(_index_sources(stacks=False)).top_k_by_source(query, {})
+    best, best_score = "style", 0.0
+    for domain, config in CSV_CONFIG.items():
+        score = strength.get((str(DATA_DIR / config["file"]), tuple(config["search_cols"])), 0.0)
+        if score > best_score:
+            best, best_score = domain, score
+    return best
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
 
+def check_domain_detection():
+    """Return (query, expected, detected) for every DOMAIN_DETECTION_CASES query detect_domain routes elsewhere"""
+    mismatches = []
+    for query, expected in DOMAIN_DETECTION_CASES.items():
+        detected = detect_domain(query)
+        if detected != expected:
+            mismatches.append((query, expected, detected))
+    return mismatches
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+
+def _domain_target(query, domain):
+    """Resolve a domain search to (response header, (path, search cols, output cols)) or (error, None)"""
     if domain is None:
         domain = detect_domain(query)
 
@@ -223,36 +1163,161 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     filepath = DATA_DIR / config["file"]
 
     if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
-
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+        return {"error": f"File not found: {filepath}", "domain": domain}, None
 
-    return {
-        "domain": domain,
-        "query": query,
-        "file": config["file"],
-        "count": len(results),
-        "results": results
-    }
+    header = {"domain": domain, "query": query, "file": config["file"]}
+    return header, (filepath, config["search_cols"], config["output_cols"])
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
+def _stack_target(query, stack):
+    """Resolve a stack search to (response header, (path, search cols, output cols)) or (error, None)"""
     if stack not in STACK_CONFIG:
-        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}, None
 
     filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
 
     if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+        return {"error": f"Stack file not found: {filepath}", "stack": stack}, None
+
+    header = {"domain": "stack", "stack": stack, "query": query, "file": STACK_CONFIG[stack]["file"]}
+    return header, (filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
+
+
+def search(query, domain=None, max_results=MAX_RESULTS):
+    """Main search function with auto-domain detection"""
+    header, target = _domain_target(query, domain)
+    if target is None:
+        return header
+
+    results = _search_csv(*target, query, max_results)
+    return dict(header, count=len(results), results=results)
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS):
+    """Search stack-specific guidelines"""
+    header, target = _stack_target(query, stack)
+    if target is None:
+        return header
+
+    results = _search_csv(*target, query, max_results)
+    return dict(header, count=len(results), results=results)
+
+
+def search_many(queries, timings=None):
+    """Run many searches in one pass over shared indexes.
+
+    Each item is ``(query, domain[, max_results])`` (domain None = auto-detect)
+    or a dict with "query", "domain" or "stack", and optional "max_results".
+    Each distinct query is tokenized once and each CSV index is loaded once;
+    a query asked of several CSVs is scored in one pass over the unified
+    index when that index is already in memory or on disk (it is never fitted
+    here, since that costs more than the per-CSV searches it would replace).
+    Results come back in input order, shaped like search() / search_stack().
+
+    With a timings dict, timings["items"] gets the milliseconds spent on each
+    item's CSV, in input order (items on the same CSV share the figure), and
+    timings["shared"] those of the unified-index pass.
+    """
+    responses = [None] * len(queries)
+    item_targets = [None] * len(queries)
+    spent = defaultdict(float)
+    groups = {}
+    for pos, item in enumerate(queries):
+        if isinstance(item, dict):
+            query = item.get("query", "")
+            max_results = item.get("max_results", MAX_RESULTS)
+            if item.get("stack"):
+                header, target = _stack_target(query, item["stack"])
+            else:
+                header, target = _domain_target(query, item.get("domain"))
+        else:
+            query, domain, max_results = item if len(item) == 3 else (*item, MAX_RESULTS)
+            header, target = _domain_target(query, domain)
+
+        if target is None:
+            responses[pos] = header
+        else:
+            filepath, search_cols, output_cols = target
+            key = (filepath, tuple(search_cols), tuple(output_cols))
+            groups.setdefault(key, []).append((pos, header, query, max_results))
+            item_targets[pos] = key
+
+    tokens = {}
+    pending = []
+    for target, members in groups.items():
+        started = time.perf_counter()
+        filepath, search_cols, output_cols = target
+        signature = _file_signature(filepath)
+        misses = []
+        for pos, header, query, max_results in members:
+            key = _result_key(target, query, max_results)
+            results = _RESULT_CACHE.get(key, signature)
+            if results is None:
+                misses.append((pos, header, query, max_results, key))
+            else:
+                responses[pos] = dict(header, count=len(results), results=[dict(row) for row in results])
+        if misses:
+            pending.append((target, signature, misses))
+            for _, _, query, _, _ in misses:
+                if query not in tokens:
+                    tokens[query] = tokenize(query)
+        spent[target] += time.perf_counter() - started
+
+    # A query missing on several CSVs is scored once over the unified index
+    started = time.perf_counter()
+    spans = defaultdict(set)
+    for target, _, misses in pending:
+        for _, _, query, _, _ in misses:
+            spans[query].add(target)
+    shared = {query: {} for query, targets in spans.items() if len(targets) > 1}
+    if shared:
+        for target, _, misses in pending:
+            source = (str(target[0]), target[1])
+            for _, _, query, max_results, _ in misses:
+                if query in shared:
+                    ks = shared[query]
+                    ks[source] = max(ks.get(source, 0), max_results)
+        needed = set().union(*shared.values())
+        domain_sources = _index_sources(stacks=False)
+        domain_keys = {(str(DATA_DIR / filename), tuple(cols)) for filename, cols in domain_sources}
+        multi = _get_multi_index(domain_sources if needed <= domain_keys else None, build=False)
+        if multi is None:
+            shared = {}
+        else:
+            shared = {query: multi.top_k_by_source(tokens[query], ks)[0] for query, ks in shared.items()}
+    shared_time = time.perf_counter() - started
+
+    for target, signature, misses in pending:
+        started = time.perf_counter()
+        filepath, search_cols, output_cols = target
+        data, bm25 = _get_index(filepath, search_cols, signature)
+        source = (str(filepath), search_cols)
+        ranked = {}
+        rest = list(dict.fromkeys(query for _, _, query, _, _ in misses if query not in shared))
+        if rest:
+            # One ranking pass at the largest k; smaller requests take a prefix
+            k = max(max_results for _, _, query, max_results, _ in misses if query not in shared)
+            ranked = dict(zip(rest, bm25.top_k_batch([tokens[query] for query in rest], k)))
+        for pos, header, query, max_results, key in misses:
+            hits = shared[query][source] if query in shared else ranked[query]
+            results = _rows_to_results(data, hits[:max(max_results, 0)], output_cols)
+            _RESULT_CACHE.put(key, signature, results)
+            responses[pos] = dict(header, count=len(results), results=[dict(row) for row in results])
+        spent[target] += time.perf_counter() - started
+
+    if timings is not None:
+        timings["items"] = [round(spent[target] * 1000, 3) if target else 0.0 for target in item_targets]
+        timings["shared"] = round(shared_time * 1000, 3)
+    return responses
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
 
+def search_all(query, max_results=MAX_RESULTS):
+    """Top hits of every domain and stack for one query, from a single pass over the unified index"""
+    domains = list(CSV_CONFIG)
+    responses = search_many([(query, domain, max_results) for domain in domains]
+                            + [{"query": query, "stack": stack, "max_results": max_results} for stack in AVAILABLE_STACKS])
     return {
-        "domain": "stack",
-        "stack": stack,
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
+        "domains": dict(zip(domains, responses)),
+        "stacks": dict(zip(AVAILABLE_STACKS, responses[len(domains):])),
     }
@@ -11,18 +11,41 @@ Usage:
     # With persistence (Master + Overrides pattern)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True)
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
+
+    # Long-lived processes: one shared generator keeps rules, indexes and results warm
+    design_system = DesignSystemGenerator.shared().generate("SaaS dashboard")
 """
 
+import copy
 import csv
+import hashlib
+import io
 import json
 import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from bisect import bisect_right
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+from typing import TextIO
+from core import CSV_CONFIG, DATA_DIR, ResultCache, build_indexes, rerank, search_many, tokenize
+
+try:
+    import msgpack
+except ImportError:  # Optional: compact binary design systems fall back to zlib-compressed JSON
+    msgpack = None
 
 
 # ============ CONFIGURATION ============
 REASONING_FILE = "ui-reasoning.csv"
+# Priority keyword weights when picking the best style; other fields count 1
+PRIORITY_FIELD_WEIGHTS = {"Style Category": 10, "Keywords": 3}
+# Max memoized generate() results per generator; 0 disables the memo
+GENERATE_CACHE_SIZE = int(os.environ.get("UIPRO_DESIGN_CACHE", "256"))
 
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
@@ -33,12 +56,71 @@ SEARCH_CONFIG = {
 }
 
 
+def _file_state(filepath: Path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _data_signature() -> tuple:
+    """State of every CSV a generated design system is built from"""
+    files = [CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG] + [REASONING_FILE]
+    return tuple(_file_state(DATA_DIR / filename) for filename in files)
+
+
+def _first_contained(text: str, table: dict, lengths: list):
+    """Lowest index among table keys occurring in text (lengths = distinct key lengths)"""
+    best = None
+    for length in lengths:
+        for start in range(len(text) - length + 1):
+            idx = table.get(text[start:start + length])
+            if idx is not None and (best is None or idx < best):
+                best = idx
+    return best
+
+
+def _first_within(text: str, haystack: str, starts: list):
+    """Lowest index of a category containing text (haystack = categories joined by newlines starting at starts)"""
+    if not starts or "\n" in text:
+        return None
+    pos = haystack.find(text)
+    return bisect_right(starts, pos) - 1 if pos >= 0 else None
+
+
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
+    _shared = None
+    _shared_lock = threading.Lock()
+
     def __init__(self):
+        self._reasoning_state = _file_state(DATA_DIR / REASONING_FILE)
         self.reasoning_data = self._load_reasoning()
+        self._results = ResultCache(GENERATE_CACHE_SIZE)
+        self._rule_index = None
+        self._category_rules = {}
+        self._parsed_rules = {}
+
+    @classmethod
+    def shared(cls) -> "DesignSystemGenerator":
+        """Process-wide generator with warm caches, recreated when ui-reasoning.csv changes."""
+        state = _file_state(DATA_DIR / REASONING_FILE)
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared._reasoning_state != state:
+                cls._shared = cls()
+            return cls._shared
+
+    def cache_info(self) -> dict:
+        """Hit/miss/eviction counters of the generate() memo"""
+        return self._results.info()
+
+    def clear_cache(self):
+        """Drop every memoized generate() result"""
+        self._results.clear()
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
@@ -48,48 +130,83 @@ class DesignSystemGenerator:
         with open(filepath, 'r', encoding='utf-8') as f:
             return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
+    def _multi_domain_search(self, query: str, style_priority: list = None, domains: list = None,
+                             timings: dict = None) -> dict:
+        """Execute searches across multiple domains in one batched pass.
+
+        With timings, records the milliseconds of each domain's search in
+        timings["domains"] and adds the unified-index pass to timings["shared"]
+        (see search_many).
+        """
+        domains = list(domains or SEARCH_CONFIG)
+        batch = []
+        for domain in domains:
+            config = SEARCH_CONFIG[domain]
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
                 combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                batch.append((combined_query, domain, config["max_results"]))
             else:
-                results[domain] = search(query, domain, config["max_results"])
+                batch.append((query, domain, config["max_results"]))
+
+        batch_timings = {} if timings is not None else None
+        results = dict(zip(domains, search_many(batch, batch_timings)))
+        if timings is not None:
+            timings.setdefault("domains", {}).update(zip(domains, batch_timings["items"]))
+            timings["shared"] = round(timings.get("shared", 0.0) + batch_timings["shared"], 3)
         return results
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
+    def _compile_rules(self) -> tuple:
+        """Index reasoning rules by UI_Category; every table keeps the first (lowest) rule index."""
+        exact, keywords, starts = {}, {}, []
+        categories = [rule.get("UI_Category", "").lower() for rule in self.reasoning_data]
+        offset = 0
+        for idx, ui_cat in enumerate(categories):
+            exact.setdefault(ui_cat, idx)
+            starts.append(offset)
+            offset += len(ui_cat) + 1
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                keywords.setdefault(kw, idx)
+        # "category in ui_cat" for every rule at once: the first find() hit is the lowest rule
+        haystack = "\n".join(categories)
+        return exact, haystack, starts, keywords, sorted({len(c) for c in exact}), sorted({len(k) for k in keywords})
+
+    def _match_rule(self, category: str):
+        """Index of the reasoning rule for a category (None if nothing matches), memoized.
+
+        Same result as scanning the rules in order for an exact, then partial,
+        then keyword match.
+        """
         category_lower = category.lower()
+        if category_lower in self._category_rules:
+            return self._category_rules[category_lower]
+        if self._rule_index is None:
+            self._rule_index = self._compile_rules()
+        exact, haystack, starts, keywords, cat_lengths, kw_lengths = self._rule_index
+
+        # Exact match first
+        idx = exact.get(category_lower)
+        if idx is None:
+            # Partial match: a UI_Category inside the category, or the category inside a UI_Category
+            hits = [i for i in (_first_within(category_lower, haystack, starts),
+                                _first_contained(category_lower, exact, cat_lengths)) if i is not None]
+            # Keyword match
+            idx = min(hits) if hits else _first_contained(category_lower, keywords, kw_lengths)
+
+        self._category_rules[category_lower] = idx
+        return idx
 
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        idx = self._match_rule(category)
+        return self.reasoning_data[idx] if idx is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        idx = self._match_rule(category)
 
-        if not rule:
+        if idx is None:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -101,23 +218,31 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
+        reasoning = self._parsed_rules.get(idx)
+        if reasoning is None:
+            rule = self.reasoning_data[idx]
+
+            # Parse decision rules JSON
+            decision_rules = {}
+            try:
+                decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+            except json.JSONDecodeError:
+                pass
+
+            reasoning = self._parsed_rules[idx] = {
+                "pattern": rule.get("Recommended_Pattern", ""),
+                "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+                "color_mood": rule.get("Color_Mood", ""),
+                "typography_mood": rule.get("Typography_Mood", ""),
+                "key_effects": rule.get("Key_Effects", ""),
+                "anti_patterns": rule.get("Anti_Patterns", ""),
+                "decision_rules": decision_rules,
+                "severity": rule.get("Severity", "MEDIUM")
+            }
 
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        # Callers get their own lists/dicts so the parsed rule stays pristine
+        return dict(reasoning, style_priority=list(reasoning["style_priority"]),
+                    decision_rules=dict(reasoning["decision_rules"]))
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -128,42 +253,53 @@ class DesignSystemGenerator:
             return results[0]
 
         # First: try exact style name match
-        for priority in priority_keywords:
-            priority_lower = priority.lower().strip()
-            for result in results:
-                style_name = result.get("Style Category", "").lower()
+        priorities = [priority.lower().strip() for priority in priority_keywords]
+        style_names = [result.get("Style Category", "").lower() for result in results]
+        for priority_lower in priorities:
+            for result, style_name in zip(results, style_names):
                 if priority_lower in style_name or style_name in priority_lower:
                     return result
 
-        # Second: score by keyword match in all fields
-        scored = []
-        for result in results:
-            result_str = str(result).lower()
-            score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
-                # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
-                    score += 10
-                # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
-                    score += 3
-                # Even lower for other field matches
-                elif kw_lower in result_str:
-                    score += 1
-            scored.append((score, result))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored[0][1] if scored and scored[0][0] > 0 else results[0]
+        # Second: field-weighted rerank (style name > keywords > any other field)
+        scored = rerank("style", results, priorities, PRIORITY_FIELD_WEIGHTS)
+        return scored[0][1] if scored[0][0] > 0 else results[0]
 
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
     def generate(self, query: str, project_name: str = None) -> dict:
-        """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        """Generate complete design system recommendation.
+
+        Results are memoized per normalized query (token multiset) and project
+        name, and invalidated when any source CSV changes.
+        """
+        return self.generate_timed(query, project_name)[0]
+
+    def generate_timed(self, query: str, project_name: str = None) -> tuple:
+        """generate() plus its timings in milliseconds.
+
+        Returns (design system, {"domains": {domain: ms}, "shared": ms, "total": ms});
+        a memoized result has no domain timings.
+        """
+        started = time.perf_counter()
+        timings = {"domains": {}, "shared": 0.0}
+        project_name = project_name or query.upper()
+        key = (tuple(sorted(tokenize(query))), project_name)
+        signature = _data_signature()
+        design_system = self._results.get(key, signature)
+        if design_system is None:
+            design_system = self._generate(query, project_name, timings)
+            self._results.put(key, signature, design_system)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+        # Callers get their own copy so the memoized result stays pristine
+        return copy.deepcopy(design_system), timings
+
+    def _generate(self, query: str, project_name: str, timings: dict = None) -> dict:
+        # Step 1: Every lookup that only needs the query, in one pass (product gives the category)
+        search_results = self._multi_domain_search(query, domains=[d for d in SEARCH_CONFIG if d != "style"],
+                                                   timings=timings)
+        product_result = search_results["product"]
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
@@ -173,9 +309,8 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Style search with style priority hints
+        search_results.update(self._multi_domain_search(query, style_priority, ["style"], timings))
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -195,7 +330,7 @@ class DesignSystemGenerator:
         combined_effects = style_effects if style_effects else reasoning_effects
 
         return {
-            "project_name": project_name or query.upper(),
+            "project_name": project_name,
             "category": category,
             "pattern": {
                 "name": best_landing.get("Pattern Name", reasoning.get("pattern", "Hero + Features + CTA")),
@@ -239,8 +374,30 @@ class DesignSystemGenerator:
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
-def format_ascii_box(design_system: dict) -> str:
-    """Format design system as ASCII box with emojis (MCP-style)."""
+
+class _LineWriter:
+    """Streams lines to a text handle exactly as "\n".join(lines) would render them."""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.started = False
+
+    def append(self, line: str):
+        if self.started:
+            self.out.write("\n")
+        self.started = True
+        self.out.write(line)
+
+
+def _render(writer, design_system: dict, *args) -> str:
+    """Run a write_* formatter into a string."""
+    buffer = io.StringIO()
+    writer(design_system, buffer, *args)
+    return buffer.getvalue()
+
+
+def write_ascii_box(design_system: dict, out: TextIO):
+    """Stream the design system as an ASCII box with emojis (MCP-style) to out."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -272,7 +429,7 @@ def format_ascii_box(design_system: dict) -> str:
     sections = [s.strip() for s in sections if s.strip()]
 
     # Build output lines
-    lines = []
+    lines = _LineWriter(out)
     w = BOX_WIDTH - 1
 
     lines.append("+" + "-" * w + "+")
@@ -361,11 +518,14 @@ def format_ascii_box(design_system: dict) -> str:
 
     lines.append("+" + "-" * w + "+")
 
-    return "\n".join(lines)
 
+def format_ascii_box(design_system: dict) -> str:
+    """Format design system as ASCII box with emojis (MCP-style)."""
+    return _render(write_ascii_box, design_system)
 
-def format_markdown(design_system: dict) -> str:
-    """Format design system as markdown."""
+
+def write_markdown(design_system: dict, out: TextIO):
+    """Stream the design system as markdown to out."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -374,7 +534,7 @@ def format_markdown(design_system: dict) -> str:
     effects = design_system.get("key_effects", "")
     anti_patterns = design_system.get("anti_patterns", "")
 
-    lines = []
+    lines = _LineWriter(out)
     lines.append(f"## Design System: {project}")
     lines.append("")
 
@@ -455,92 +615,395 @@ def format_markdown(design_system: dict) -> str:
     lines.append("- [ ] Responsive: 375px, 768px, 1024px, 1440px")
     lines.append("")
 
-    return "\n".join(lines)
+
+def format_markdown(design_system: dict) -> str:
+    """Format design system as markdown."""
+    return _render(write_markdown, design_system)
+
+
+# ============ STRUCTURED OUTPUT ============
+SCHEMA_ID = "ui-ux-pro-max/design-system"
+SCHEMA_VERSION = 1
+DESIGN_SYSTEM_FILE = "design-system.json"
+# Binary encoding: magic + codec byte ("m" = MessagePack, "z" = zlib-compressed JSON) + payload
+BINARY_MAGIC = b"UIPXDS1"
+
+# Fields of each section of the dict returned by DesignSystemGenerator.generate()
+_SECTION_FIELDS = {
+    "pattern": ["name", "sections", "cta_placement", "color_strategy", "conversion"],
+    "style": ["name", "type", "effects", "keywords", "best_for", "performance", "accessibility"],
+    "colors": ["primary", "secondary", "cta", "background", "text", "notes"],
+    "typography": ["heading", "body", "mood", "best_for", "google_fonts_url", "css_import"],
+}
+_TEXT_FIELDS = ["project_name", "category", "key_effects", "anti_patterns", "severity"]
+
+DESIGN_SYSTEM_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "$id": f"{SCHEMA_ID}/v{SCHEMA_VERSION}",
+    "title": "UI Pro Max design system",
+    "type": "object",
+    "required": ["schema", "version", "design_system"],
+    "properties": {
+        "schema": {"const": SCHEMA_ID},
+        "version": {"const": SCHEMA_VERSION},
+        "query": {"type": ["string", "null"]},
+        "design_system": {
+            "type": "object",
+            "required": _TEXT_FIELDS + list(_SECTION_FIELDS) + ["decision_rules"],
+            "properties": {
+                **{field: {"type": "string"} for field in _TEXT_FIELDS},
+                **{
+                    section: {
+                        "type": "object",
+                        "required": fields,
+                        "properties": {field: {"type": ["string", "null"]} for field in fields},
+                    }
+                    for section, fields in _SECTION_FIELDS.items()
+                },
+                "decision_rules": {"type": "object"},
+            },
+        },
+    },
+}
+
+
+def validate_design_system(design_system: dict):
+    """Check a design system dict against DESIGN_SYSTEM_SCHEMA; raises ValueError on the first problem."""
+    if not isinstance(design_system, dict):
+        raise ValueError("design system must be an object")
+    for field in _TEXT_FIELDS:
+        if not isinstance(design_system.get(field), str):
+            raise ValueError(f"{field} must be a string")
+    for section, fields in _SECTION_FIELDS.items():
+        values = design_system.get(section)
+        if not isinstance(values, dict):
+            raise ValueError(f"{section} must be an object")
+        for field in fields:
+            if field not in values or not isinstance(values[field], (str, type(None))):
+                raise ValueError(f"{section}.{field} must be a string")
+    if not isinstance(design_system.get("decision_rules"), dict):
+        raise ValueError("decision_rules must be an object")
+
+
+def to_document(design_system: dict, query: str = None) -> dict:
+    """Wrap a generate() result in the versioned schema envelope."""
+    validate_design_system(design_system)
+    return {"schema": SCHEMA_ID, "version": SCHEMA_VERSION, "query": query, "design_system": design_system}
+
+
+def write_json(design_system: dict, out: TextIO, query: str = None):
+    """Stream the design system as a schema-versioned JSON document to out."""
+    json.dump(to_document(design_system, query), out, indent=2, ensure_ascii=False)
+
+
+def format_json(design_system: dict, query: str = None) -> str:
+    """Format design system as a schema-versioned JSON document."""
+    return _render(write_json, design_system, query)
+
+
+def encode_design_system(design_system: dict, query: str = None, binary: bool = False) -> bytes:
+    """Encode a design system as JSON, or compactly (MessagePack if installed, else zlib JSON) with binary=True."""
+    document = to_document(design_system, query)
+    if not binary:
+        return json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8")
+    if msgpack is not None:
+        return BINARY_MAGIC + b"m" + msgpack.packb(document, use_bin_type=True)
+    compact = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return BINARY_MAGIC + b"z" + zlib.compress(compact, 9)
+
+
+def decode_design_system(data: bytes) -> dict:
+    """Decode either encoding back to the generate() dict; raises ValueError if invalid or of another version."""
+    if data.startswith(BINARY_MAGIC):
+        codec, payload = data[len(BINARY_MAGIC):len(BINARY_MAGIC) + 1], data[len(BINARY_MAGIC) + 1:]
+        if codec == b"m":
+            if msgpack is None:
+                raise ValueError("msgpack is not installed; cannot read MessagePack design systems")
+            document = msgpack.unpackb(payload, raw=False)
+        elif codec == b"z":
+            try:
+                document = json.loads(zlib.decompress(payload))
+            except zlib.error as e:
+                raise ValueError(f"Corrupt design system: {e}") from e
+        else:
+            raise ValueError(f"Unknown design system codec: {codec!r}")
+    else:
+        document = json.loads(data)
+
+    if not isinstance(document, dict) or document.get("schema") != SCHEMA_ID:
+        raise ValueError("Not a UI Pro Max design system document")
+    if document.get("version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported design system schema version: {document.get('version')}")
+    validate_design_system(document.get("design_system"))
+    return document["design_system"]
+
+
+def load_design_system(path) -> dict:
+    """
+    Load a persisted design system without parsing Markdown.
+
+    path may be a design-system/<project>/ directory, its MASTER.md or one of
+    its pages/ (or pages/<page>.md), or an encoded .json/.bin file.
+    """
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".md":
+        root = path if path.is_dir() else path.parent
+        # Page overrides live one level below the project's design-system.json
+        if root.name == "pages" and not (root / DESIGN_SYSTEM_FILE).exists():
+            root = root.parent
+        path = root / DESIGN_SYSTEM_FILE
+    with open(path, 'rb') as f:
+        return decode_design_system(f.read())
+
+
+def load_design_systems(output_dir: str = None):
+    """Yield (design system dir, design system) for every system persisted under <output_dir>/design-system/."""
+    root = (Path(output_dir) if output_dir else Path.cwd()) / "design-system"
+    for path in sorted(root.rglob(DESIGN_SYSTEM_FILE)):
+        yield str(path.parent), load_design_system(path)
 
 
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           out: TextIO = None, timings: dict = None) -> str:
     """
     Main entry point for design system generation.
 
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json" (schema-versioned)
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        out: Optional text handle (e.g. sys.stdout) to stream the output to instead
+        timings: Optional dict, filled with the generation timings (see generate_timed)
 
     Returns:
-        Formatted design system string
+        Formatted design system string (None when streamed to out)
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    design_system, measured = DesignSystemGenerator.shared().generate_timed(query, project_name)
+    if timings is not None:
+        timings.update(measured)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        for warning in persist_design_system(design_system, page, output_dir, query)["warnings"]:
+            print(f"Warning: {warning}", file=sys.stderr)
+
+    if output_format == "json":
+        writer, args = write_json, (query,)
+    else:
+        writer, args = (write_markdown if output_format == "markdown" else write_ascii_box), ()
+    if out is not None:
+        writer(design_system, out, *args)
+        out.write("\n")
+        return None
+    return _render(writer, design_system, *args)
+
+
+def _init_bulk_worker():
+    """Load every index and the reasoning table once per worker process."""
+    build_indexes()
+    DesignSystemGenerator.shared()
+
+
+def _bulk_generate(job: tuple) -> dict:
+    """Generate (and optionally persist) one design system; errors are reported per query."""
+    query, persist, page, output_dir = job
+    try:
+        design_system = DesignSystemGenerator.shared().generate(query)
+        if persist:
+            return {"query": query, **persist_design_system(design_system, page, output_dir, query)}
+        return to_document(design_system, query)
+    except Exception as e:
+        return {"query": query, "error": f"{type(e).__name__}: {e}"}
+
+
+def generate_design_systems(queries: list, jobs: int = 1, persist: bool = False,
+                            page: str = None, output_dir: str = None):
+    """
+    Bulk design system generation; yields one result dict per query, in input order.
+
+    Each result is a schema-versioned document (see to_document), or with persist=True the
+    persist_design_system() status for design-system/<query slug>/. With
+    jobs > 1 queries are fanned out across a process pool whose workers load
+    the indexes once.
+    """
+    jobs_list = [(query, persist, page, output_dir) for query in queries]
+    if jobs <= 1 or len(jobs_list) <= 1:
+        for job in jobs_list:
+            yield _bulk_generate(job)
+        return
+
+    # Imported on use: only bulk runs need multiprocessing, and it slows every -ds start
+    from concurrent.futures import ProcessPoolExecutor
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    chunksize = max(1, min(32, len(jobs_list) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_bulk_worker) as executor:
+        yield from executor.map(_bulk_generate, jobs_list, chunksize=chunksize)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+# The generation timestamp is not content: it is masked before hashing
+_GENERATED_LINE = re.compile(r"^(>? ?\*\*Generated:\*\* ).*$", re.MULTILINE)
+
+
+def slugify(name: str) -> str:
+    """Folder/file name for a project or page: lowercase with spaces as "-", kept to one path component."""
+    slug = re.sub(r'[\\/\x00]', '-', name.lower().replace(' ', '-'))
+    # No ".", ".." or hidden names
+    return slug.lstrip('.') or "default"
+
+
+def _content_hash(content: str) -> str:
+    """SHA-256 of a persisted file, ignoring its Generated timestamp"""
+    return hashlib.sha256(_GENERATED_LINE.sub(r"\1", content).encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: Path, content: str):
+    """Write via a temp file in the same directory and rename, so readers never see partial files"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _load_manifest(design_system_dir: Path) -> dict:
+    """{relative path: {"sha256", "size", "mtime_ns"}} of the files last persisted here"""
+    try:
+        with open(design_system_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def _write_if_changed(design_system_dir: Path, relative: str, content: str, manifest: dict) -> bool:
+    """Persist one file unless an identical one is already on disk; returns True if written"""
+    path = design_system_dir / relative
+    digest = _content_hash(content)
+    state = _file_state(path)
+    entry = manifest.get(relative)
+    if state is not None:
+        if entry and entry.get("sha256") == digest and (entry.get("mtime_ns"), entry.get("size")) == state:
+            return False
+        # Untracked or touched since: compare against what is actually there
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                unchanged = _content_hash(f.read()) == digest
+        except (OSError, UnicodeDecodeError):
+            unchanged = False
+        if unchanged:
+            manifest[relative] = {"sha256": digest, "size": state[1], "mtime_ns": state[0]}
+            return False
+
+    _atomic_write(path, content)
+    state = _file_state(path)
+    manifest[relative] = {"sha256": digest, "size": state[1], "mtime_ns": state[0]}
+    return True
+
+
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          pages: list = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
+
+    MASTER.md is accompanied by design-system.json (the schema-versioned
+    document, readable with load_design_system) when the design system passes
+    validate_design_system; otherwise that file is left out (and a stale one
+    removed) and the problem is reported in "warnings". Files whose content
+    (ignoring the Generated timestamp) is unchanged are not
+    rewritten; changed files are replaced atomically. Content hashes are kept
+    in design-system/<project>/manifest.json.
     
     Args:
         design_system: The generated design system dictionary
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        pages: Optional list of further pages to persist in the same call, each a
+               page name or a (page name, page query) tuple
     
     Returns:
-        dict with created file paths and status
+        dict with status, persisted file paths, the subset left unchanged and warnings
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
     # Use project name for project-specific folder
     project_name = design_system.get("project_name", "default")
-    project_slug = project_name.lower().replace(' ', '-')
+    project_slug = slugify(project_name)
     
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
     
     created_files = []
+    unchanged_files = []
     
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
-    
-    master_file = design_system_dir / "MASTER.md"
-    
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
-    
-    # If page is specified, create page override file with intelligent content
-    if page:
-        page_file = pages_dir / f"{page.lower().replace(' ', '-')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+
+    manifest = _load_manifest(design_system_dir)
+    previous = json.dumps(manifest, sort_keys=True)
+
+    # MASTER.md and its machine-readable twin, then one override file per requested page
+    outputs = [("MASTER.md", format_master_md(design_system))]
+    warnings = []
+    try:
+        validate_design_system(design_system)
+    except ValueError as e:
+        warnings.append(f"{DESIGN_SYSTEM_FILE} not written: {e}")
+        try:
+            (design_system_dir / DESIGN_SYSTEM_FILE).unlink()
+        except FileNotFoundError:
+            pass
+        manifest.pop(DESIGN_SYSTEM_FILE, None)
+    else:
+        outputs.append((DESIGN_SYSTEM_FILE, format_json(design_system, page_query) + "\n"))
+    page_specs = ([(page, page_query)] if page else []) + [
+        spec if isinstance(spec, tuple) else (spec, page_query) for spec in pages or []
+    ]
+    # Every page is searched in one batch and the site map classified in one pass
+    page_overrides = _generate_intelligent_overrides_many(page_specs, design_system) if page_specs else []
+    for (page_name, query), overrides in zip(page_specs, page_overrides):
+        relative = f"pages/{slugify(page_name)}.md"
+        outputs.append((relative, format_page_override_md(design_system, page_name, query, overrides)))
+
+    for relative, content in outputs:
+        path = design_system_dir / relative
+        if not _write_if_changed(design_system_dir, relative, content, manifest):
+            unchanged_files.append(str(path))
+        created_files.append(str(path))
+
+    if json.dumps(manifest, sort_keys=True) != previous:
+        _atomic_write(design_system_dir / MANIFEST_FILE,
+                      json.dumps({"version": MANIFEST_VERSION, "files": manifest}, indent=2, sort_keys=True) + "\n")
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": created_files,
+        "unchanged_files": unchanged_files,
+        "warnings": warnings
     }
 
 
-def format_master_md(design_system: dict) -> str:
-    """Format design system as MASTER.md with hierarchical override logic."""
+def write_master_md(design_system: dict, out: TextIO):
+    """Stream the design system as MASTER.md (hierarchical override logic) to out."""
     project = design_system.get("project_name", "PROJECT")
     pattern = design_system.get("pattern", {})
     style = design_system.get("style", {})
@@ -551,7 +1014,7 @@ def format_master_md(design_system: dict) -> str:
     
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    lines = []
+    lines = _LineWriter(out)
     
     # Logic header
     lines.append("# Design System Master File")
@@ -798,20 +1261,28 @@ def format_master_md(design_system: dict) -> str:
     lines.append("- [ ] No content hidden behind fixed navbars")
     lines.append("- [ ] No horizontal scroll on mobile")
     lines.append("")
-    
-    return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
-    """Format a page-specific override file with intelligent AI-generated content."""
+def format_master_md(design_system: dict) -> str:
+    """Format design system as MASTER.md with hierarchical override logic."""
+    return _render(write_master_md, design_system)
+
+
+def write_page_override_md(design_system: dict, out: TextIO, page_name: str, page_query: str = None,
+                           page_overrides: dict = None):
+    """Stream a page-specific override file with intelligent AI-generated content to out.
+
+    page_overrides may be precomputed (see _generate_intelligent_overrides_many).
+    """
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    if page_overrides is None:
+        page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
     
-    lines = []
+    lines = _LineWriter(out)
     
     lines.append(f"# {page_title} Page Overrides")
     lines.append("")
@@ -907,8 +1378,12 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
         for rec in recommendations:
             lines.append(f"- {rec}")
     lines.append("")
-    
-    return "\n".join(lines)
+
+
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            page_overrides: dict = None) -> str:
+    """Format a page-specific override file with intelligent AI-generated content."""
+    return _render(write_page_override_md, design_system, page_name, page_query, page_overrides)
 
 
 def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
@@ -918,24 +1393,37 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
-    
-    page_lower = page_name.lower()
-    query_lower = (page_query or "").lower()
-    combined_context = f"{page_lower} {query_lower}"
+    return _generate_intelligent_overrides_many([(page_name, page_query)], design_system)[0]
+
+
+def _generate_intelligent_overrides_many(page_specs: list, design_system: dict) -> list:
+    """Overrides for a list of (page name, page query) pairs with one search batch and one classifier pass."""
+    contexts = [f"{page_name.lower()} {(page_query or '').lower()}" for page_name, page_query in page_specs]
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
-    
-    # Extract results from search response
-    style_results = style_search.get("results", [])
-    ux_results = ux_search.get("results", [])
-    landing_results = landing_search.get("results", [])
+    searches = search_many([
+        (context, domain, limit)
+        for context in contexts
+        for domain, limit in (("style", 1), ("ux", 3), ("landing", 1))
+    ])
+    page_types = classify_page_types(contexts)
     
+    overrides = []
+    for i, page_type in enumerate(page_types):
+        style_search, ux_search, landing_search = searches[3 * i:3 * i + 3]
+        overrides.append(_build_overrides(
+            page_type,
+            style_search.get("results", []),
+            ux_search.get("results", []),
+            landing_search.get("results", []),
+        ))
+    return overrides
+
+
+def _build_overrides(page_type, style_results: list, ux_results: list, landing_results: list) -> dict:
+    """Page overrides from the page's search results; page_type is the context classification or None"""
     # Detect page type from search results or context
-    page_type = _detect_page_type(combined_context, style_results)
+    page_type = page_type or _page_type_from_styles(style_results)
     
     # Build overrides from search results
     layout = {}
@@ -1017,29 +1505,56 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     }
 
 
-def _detect_page_type(context: str, style_results: list) -> str:
-    """Detect page type from context and search results."""
-    context_lower = context.lower()
-    
-    # Check for common page type patterns
-    page_patterns = [
-        (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
-        (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
-        (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
-        (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
-        (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
-        (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
-        (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
-        (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
-        (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
-        (["empty", "404", "error", "not found", "zero"], "Empty State"),
-    ]
-    
-    for keywords, page_type in page_patterns:
-        if any(kw in context_lower for kw in keywords):
-            return page_type
-    
-    # Fallback: try to infer from style results
+# Page type keyword groups, highest priority first (first matching group wins)
+PAGE_TYPE_PATTERNS = [
+    (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
+    (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
+    (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
+    (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
+    (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
+    (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
+    (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
+    (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
+    (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
+    (["empty", "404", "error", "not found", "zero"], "Empty State"),
+]
+
+# keyword -> group index (a keyword listed twice belongs to its first group)
+_PAGE_KEYWORD_GROUP = {}
+for _group, (_keywords, _) in enumerate(PAGE_TYPE_PATTERNS):
+    for _keyword in _keywords:
+        _PAGE_KEYWORD_GROUP.setdefault(_keyword, _group)
+# Zero-width lookahead reports a keyword at every position (overlaps included);
+# alternatives are in group order, so each position yields its best group
+_PAGE_TYPE_RE = re.compile("(?=(" + "|".join(re.escape(kw) for kw in _PAGE_KEYWORD_GROUP) + "))")
+
+
+def _match_page_type(context_lower: str):
+    """Page type of the highest-priority keyword group occurring in context (None if none do)"""
+    best = len(PAGE_TYPE_PATTERNS)
+    for match in _PAGE_TYPE_RE.finditer(context_lower):
+        group = _PAGE_KEYWORD_GROUP[match.group(1)]
+        if group < best:
+            best = group
+            if best == 0:
+                break
+    return PAGE_TYPE_PATTERNS[best][1] if best < len(PAGE_TYPE_PATTERNS) else None
+
+
+def classify_page_types(contexts: list) -> list:
+    """Classify a whole site map of page names/contexts at once; None where no keyword matches."""
+    cache = {}
+    page_types = []
+    for context in contexts:
+        context_lower = context.lower()
+        if context_lower not in cache:
+            cache[context_lower] = _match_page_type(context_lower)
+        page_types.append(cache[context_lower])
+    return page_types
+
+
+def _page_type_from_styles(style_results: list) -> str:
+    """Fallback page type inferred from the top style's Best For"""
     if style_results:
         style_name = style_results[0].get("Style Category", "").lower()
         best_for = style_results[0].get("Best For", "").lower()
@@ -1059,7 +1574,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate Design System")
     parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--format", "-f", choices=["ascii", "markdown", "json"], default="ascii", help="Output format")
 
     args = parser.parse_args()
 
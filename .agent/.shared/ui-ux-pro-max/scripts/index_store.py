@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Index Store - compact on-disk container for compiled search indexes
+
+File layout (native byte order, one file per indexed CSV):
+    MAGIC | uint32 header length | JSON header | raw array payloads
+
+The JSON header carries the source signature used for validation plus the
+typecode, offset and length of every array. The file is memory-mapped and each
+array is loaded with a single ``array.frombytes`` over a slice of the mapping.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+
+MAGIC = b"UIPXIDX1"
+FORMAT_VERSION = 3
+_HEADER_LEN = struct.Struct("<I")
+
+# Override with UIPRO_INDEX_CACHE=<dir>; set it to "off" to disable the disk cache
+_CACHE_ENV = os.environ.get("UIPRO_INDEX_CACHE", "")
+CACHE_ENABLED = _CACHE_ENV.lower() not in ("off", "0", "false")
+CACHE_DIR = Path(_CACHE_ENV) if CACHE_ENABLED and _CACHE_ENV else Path(__file__).parent.parent / ".cache"
+
+
+def file_sha1(filepath):
+    """Content hash used when mtime changed but size did not"""
+    digest = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(source, search_cols):
+    """Stable cache file name for a (CSV, search columns) pair"""
+    key = hashlib.sha1(json.dumps([str(source), list(search_cols)]).encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / f"{Path(source).stem}-{key}.idx"
+
+
+def write_index(path, header, arrays):
+    """Atomically write header + arrays; silently skip when the cache dir is not writable"""
+    header = dict(header, version=FORMAT_VERSION, byteorder=sys.byteorder, arrays={})
+    payload = []
+    offset = 0
+    for name, arr in arrays.items():
+        raw = arr.tobytes()
+        header["arrays"][name] = [arr.typecode, offset, len(raw)]
+        payload.append(raw)
+        offset += len(raw)
+
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".idx")
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LEN.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for raw in payload:
+                f.write(raw)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def read_header(path):
+    """Return (header, payload offset, mapped file) or None if missing, corrupt or outdated.
+
+    The caller closes the mapping once read_arrays() is done with it.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+    try:
+        start = len(MAGIC) + _HEADER_LEN.size
+        if len(mapped) < start or mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an index file")
+        (header_len,) = _HEADER_LEN.unpack_from(mapped, len(MAGIC))
+        if start + header_len > len(mapped):
+            raise ValueError("truncated header")
+        header = json.loads(mapped[start:start + header_len].decode("utf-8"))
+        if not isinstance(header, dict) or header.get("version") != FORMAT_VERSION or header.get("byteorder") != sys.byteorder:
+            raise ValueError("outdated index file")
+    except (ValueError, struct.error):  # UnicodeDecodeError and JSON errors are ValueErrors
+        mapped.close()
+        return None
+    return header, start + header_len, mapped
+
+
+def read_arrays(header, base, mapped):
+    """Materialize the arrays described by a header from the mapped file (ValueError if truncated)"""
+    arrays = {}
+    with memoryview(mapped) as view:
+        for name, (typecode, offset, length) in header["arrays"].items():
+            if offset < 0 or length < 0 or base + offset + length > len(view):
+                raise ValueError(f"truncated array {name}")
+            arr = array(typecode)
+            with view[base + offset:base + offset + length] as part:
+                arr.frombytes(part)
+            arrays[name] = arr
+    return arrays
@@ -3,8 +3,11 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
-       python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --batch < queries.jsonl > results.jsonl
+       python search.py --serve [--socket PATH] [--workers 2] [--pool process|thread]
+       python search.py "<query>" --design-system [-p "Project Name"] [--timings]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py --design-system --from-file queries.txt [--jobs 4] [--persist]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
@@ -12,11 +15,42 @@ Stacks: html-tailwind, react, nextjs
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+  --timings    With --design-system: print per-domain search timings to stderr
+               (generates in-process)
+
+Bulk design systems:
+  --from-file  With --design-system: one query per line ("-" = stdin, # comments skipped);
+               streams one JSONL design system per query, or with --persist writes
+               design-system/<query>/MASTER.md trees. Throughput is reported on stderr.
+  --jobs       Worker processes for --from-file (each loads the indexes once)
+
+Batch mode:
+  --batch      Read JSONL queries from stdin ({"query": ..., "domain"|"stack": ..., "max_results": 3})
+               and stream one JSONL result per line, sharing loaded indexes across queries
+
+Daemon mode:
+  --serve      Keep all indexes hot and answer JSON-line requests on a Unix socket
+               (asyncio; batch/design-system work runs in a --workers pool)
+  --status     Show daemon uptime, coalesced requests and per-op latency histograms
+  Queries (including --batch and --design-system) go through the daemon when it is
+  running and fall back to in-process search otherwise; --no-daemon forces in-process.
+
+Index cache:
+  --build-index     Precompile all CSV indexes into .cache/ (only changed CSVs are rebuilt)
+  --check-backends  Verify the NumPy BM25 backend ranks identically to the pure-Python one
+                    (select it with UIPRO_BM25_BACKEND=numpy)
+  --check-domains   Verify common queries still auto-detect to their expected domain
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+import json
+import os
+import sys
+import time
+from itertools import islice
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack, search_many, build_indexes, check_backend_parity, check_domain_detection
+import service_client
+# design_system (--design-system) and service (--serve) are imported on use to keep one-shot searches fast
 
 
 def format_output(result):
@@ -45,44 +79,203 @@ def format_output(result):
     return "\n".join(output)
 
 
+def parse_batch_line(line):
+    """Decode one --batch line into a search_many item (ValueError if malformed)"""
+    item = json.loads(line)
+    if not isinstance(item, dict) or not isinstance(item.get("query"), str):
+        raise ValueError('expected an object with a string "query"')
+    for field in ("domain", "stack"):
+        if item.get(field) is not None and not isinstance(item[field], str):
+            raise ValueError(f'"{field}" must be a string')
+    max_results = item.get("max_results", MAX_RESULTS)
+    if not isinstance(max_results, int) or isinstance(max_results, bool):
+        raise ValueError('"max_results" must be an integer')
+    return item
+
+
+def run_batch(stream, out, chunk_size=256, search_fn=search_many):
+    """Answer JSONL queries from stream, writing one JSONL result per input line"""
+    lines = (line for line in stream if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            break
+        queries, errors = [], {}
+        for pos, line in enumerate(chunk):
+            try:
+                queries.append(parse_batch_line(line))
+            except ValueError as e:
+                errors[pos] = {"error": f"Invalid query line: {e}"}
+                queries.append(None)
+
+        results = iter(search_fn([q for q in queries if q is not None]))
+        for pos, query in enumerate(queries):
+            result = errors[pos] if query is None else next(results)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def run_design_system_bulk(stream, out, jobs=1, persist=False, page=None, output_dir=None):
+    """Generate a design system per query line, writing one JSONL result per query; returns (count, seconds)"""
+    from design_system import generate_design_systems
+
+    queries = [line.strip() for line in stream if line.strip() and not line.lstrip().startswith("#")]
+    started = time.perf_counter()
+    for result in generate_design_systems(queries, jobs, persist, page, output_dir):
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+    return len(queries), time.perf_counter() - started
+
+
+def via_daemon(args, payload):
+    """Result from the search daemon, or None to run in-process (also when the daemon reports an error)"""
+    if args.no_daemon:
+        return None
+    try:
+        return service_client.request(payload, args.socket)
+    except RuntimeError as e:
+        print(f"Warning: search daemon failed ({e}); searching in-process", file=sys.stderr)
+        return None
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--batch", action="store_true", help="Read JSONL queries from stdin and stream JSONL results")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    parser.add_argument("--format", "-f", choices=["ascii", "markdown", "json"], default="ascii", help="Output format for design system (json: schema-versioned document)")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    parser.add_argument("--timings", action="store_true", help="With --design-system: print per-domain search timings to stderr (runs in-process)")
+    parser.add_argument("--from-file", type=str, default=None, help="With --design-system: generate one design system per query line of this file (- for stdin)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="With --from-file: worker processes (default: 1)")
+    # Index cache
+    parser.add_argument("--build-index", action="store_true", help="Compile all CSV indexes into the on-disk cache and exit")
+    parser.add_argument("--force", action="store_true", help="With --build-index: rebuild even if the cache is up to date")
+    parser.add_argument("--check-backends", action="store_true", help="Verify NumPy and pure-Python BM25 rankings match")
+    parser.add_argument("--check-domains", action="store_true", help="Verify common queries auto-detect to their expected domain")
+    # Daemon
+    parser.add_argument("--serve", action="store_true", help="Run the search daemon on a Unix socket")
+    parser.add_argument("--socket", type=str, default=None, help=f"Daemon socket path (default: {service_client.SOCKET_PATH})")
+    parser.add_argument("--no-daemon", action="store_true", help="Always search in-process, even if a daemon is running")
+    parser.add_argument("--workers", type=int, default=None, help="With --serve: worker pool size for batch/design-system requests (default: 2)")
+    parser.add_argument("--pool", choices=["process", "thread"], default="process", help="With --serve: worker pool type")
+    parser.add_argument("--status", action="store_true", help="Show search daemon status and latency histograms")
 
     args = parser.parse_args()
 
+    if args.build_index:
+        for filename, status in build_indexes(force=args.force).items():
+            print(f"{status:>7}  {filename}")
+        raise SystemExit(0)
+    if args.check_backends:
+        try:
+            mismatches = check_backend_parity(args.max_results)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            raise SystemExit(1)
+        for domain, query in mismatches:
+            print(f"MISMATCH [{domain}] {query[:80]}")
+        print(f"Backend parity: {'OK' if not mismatches else f'{len(mismatches)} mismatches'}")
+        raise SystemExit(1 if mismatches else 0)
+    if args.check_domains:
+        mismatches = check_domain_detection()
+        for query, expected, detected in mismatches:
+            print(f"MISMATCH {query!r}: expected {expected}, got {detected}")
+        print(f"Domain detection: {'OK' if not mismatches else f'{len(mismatches)} mismatches'}")
+        raise SystemExit(1 if mismatches else 0)
+    if args.serve:
+        import service
+
+        try:
+            service.serve(args.socket, args.workers, args.pool)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            raise SystemExit(1)
+        raise SystemExit(0)
+    if args.status:
+        try:
+            status = service_client.request({"op": "status"}, args.socket)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            raise SystemExit(1)
+        if status is None:
+            print("Error: no search daemon is running")
+            raise SystemExit(1)
+        print(json.dumps(status, indent=2))
+        raise SystemExit(0)
+    if args.batch:
+        def batch_search(queries):
+            result = via_daemon(args, {"op": "batch", "queries": queries})
+            return result if result is not None else search_many(queries)
+
+        run_batch(sys.stdin, sys.stdout, search_fn=batch_search)
+        raise SystemExit(0)
+    if args.from_file:
+        if not args.design_system:
+            parser.error("--from-file requires --design-system")
+        if args.from_file == "-":
+            count, elapsed = run_design_system_bulk(sys.stdin, sys.stdout, args.jobs, args.persist, args.page, args.output_dir)
+        else:
+            with open(args.from_file, encoding="utf-8") as f:
+                count, elapsed = run_design_system_bulk(f, sys.stdout, args.jobs, args.persist, args.page, args.output_dir)
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"Generated {count} design systems in {elapsed:.2f}s ({rate:.1f} queries/s, {max(args.jobs, 1)} jobs)", file=sys.stderr)
+        raise SystemExit(0)
+    if args.query is None:
+        parser.error("the following arguments are required: query")
+
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
-        )
-        print(result)
+        # The daemon persists relative to its own cwd, so pin the output directory
+        output_dir = os.path.abspath(args.output_dir or os.getcwd()) if args.persist else args.output_dir
+        # Timings describe this process's searches, so --timings never uses the daemon
+        result = None if args.timings else via_daemon(args, {
+            "op": "design_system", "query": args.query, "project_name": args.project_name,
+            "format": args.format, "persist": args.persist, "page": args.page, "output_dir": output_dir
+        })
+        if result is None:
+            from design_system import generate_design_system
+
+            timings = {} if args.timings else None
+            # In-process: stream the document straight to stdout
+            generate_design_system(
+                args.query, 
+                args.project_name, 
+                args.format,
+                persist=args.persist,
+                page=args.page,
+                output_dir=args.output_dir,
+                out=sys.stdout,
+                timings=timings
+            )
+            if timings is not None:
+                for domain, ms in timings["domains"].items():
+                    print(f"{domain:>12}  {ms:8.3f} ms", file=sys.stderr)
+                print(f"{'shared':>12}  {timings['shared']:8.3f} ms (unified-index pass)", file=sys.stderr)
+                print(f"{'total':>12}  {timings['total']:8.3f} ms", file=sys.stderr)
+        else:
+            print(result)
         
         # Print persistence confirmation
         if args.persist:
-            project_slug = args.project_name.lower().replace(' ', '-') if args.project_name else "default"
+            from design_system import slugify
+
+            project_slug = slugify(args.project_name) if args.project_name else "default"
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
             print(f"   📄 design-system/{project_slug}/MASTER.md (Global Source of Truth)")
+            print(f"   📄 design-system/{project_slug}/design-system.json (Machine-readable, see load_design_system)")
             if args.page:
-                page_filename = args.page.lower().replace(' ', '-')
+                page_filename = slugify(args.page)
                 print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
@@ -90,17 +283,19 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = via_daemon(args, {"op": "stack", "query": args.query, "stack": args.stack, "max_results": args.max_results})
+        if result is None:
+            result = search_stack(args.query, args.stack, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = via_daemon(args, {"op": "search", "query": args.query, "domain": args.domain, "max_results": args.max_results})
+        if result is None:
+            result = search(args.query, args.domain, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Service - keeps every search index hot behind a local socket
+
+Protocol: one JSON object per line in each direction over a Unix domain socket.
+    -> {"op": "search", "query": "...", "domain": null, "max_results": 3}
+    <- {"ok": true, "result": {...}}    or    {"ok": false, "error": "..."}
+
+Ops: ping, search, stack, batch (list of search_many items), design_system, status, shutdown
+
+Cheap lookups (ping/search/stack) are answered directly on the asyncio event
+loop; batch and design_system requests run in a worker pool so they never
+block small queries. Identical in-flight requests are coalesced, and status
+reports per-op latency histograms.
+
+Usage:
+    python search.py --serve [--socket PATH] [--workers 2] [--pool process|thread]
+    python search.py --status                     # daemon latency histograms
+    python search.py "<query>" ...                # uses the daemon if it is running
+
+The client side (socket path and request()) lives in service_client.py. The
+default socket is $XDG_RUNTIME_DIR/uipro-search.sock, else uipro-<uid>/search.sock
+in a private 0700 directory under the temp dir; the socket itself is 0600 and
+clients ignore sockets owned by another user.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core import MAX_RESULTS, build_indexes, search, search_cache_info, search_many, search_stack
+from design_system import generate_design_system
+from service_client import SOCKET_PATH, prepare_socket_dir, socket_alive
+
+DEFAULT_WORKERS = 2
+
+# Ops answered on the event loop; the heavy ones are offloaded to the worker pool
+LIGHT_OPS = {"ping", "search", "stack"}
+HEAVY_OPS = {"batch", "design_system"}
+# Latency histogram upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+def handle_request(payload: dict):
+    """Dispatch one decoded request and return its result (raises on bad input)."""
+    op = payload.get("op")
+    if op == "ping":
+        return {"pid": os.getpid()}
+    if op == "search":
+        return search(payload["query"], payload.get("domain"), payload.get("max_results", MAX_RESULTS))
+    if op == "stack":
+        return search_stack(payload["query"], payload["stack"], payload.get("max_results", MAX_RESULTS))
+    if op == "batch":
+        return search_many(payload["queries"])
+    if op == "design_system":
+        return generate_design_system(
+            payload["query"],
+            payload.get("project_name"),
+            payload.get("format", "ascii"),
+            persist=payload.get("persist", False),
+            page=payload.get("page"),
+            output_dir=payload.get("output_dir"),
+        )
+    raise ValueError(f"Unknown op: {op}")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one op"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS_MS)
+        self.counts[i] += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self) -> dict:
+        count = sum(self.counts)
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": count,
+            "mean_ms": round(self.total_ms / count, 3) if count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class SearchService:
+    """Asyncio request router with in-flight coalescing and a worker pool for heavy ops."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, pool: str = "process"):
+        if pool == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=build_indexes)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="uipro")
+        self.pool = pool
+        self.started = time.time()
+        self.inflight = {}
+        self.coalesced = 0
+        self.histograms = {}
+        self.stopped = None
+
+    async def dispatch(self, payload: dict) -> dict:
+        op = payload.get("op")
+        if op == "shutdown":
+            self.stopped.set()
+            return {"ok": True, "result": "shutting down"}
+        if op == "status":
+            return {"ok": True, "result": self.status()}
+
+        started = time.perf_counter()
+        # Identical read-only requests share one computation
+        key = None if payload.get("persist") else json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        future = self.inflight.get(key) if key else None
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(self._execute(payload))
+            if key:
+                self.inflight[key] = future
+                future.add_done_callback(lambda _, key=key: self.inflight.pop(key, None))
+        response = await asyncio.shield(future)
+
+        label = op if op in LIGHT_OPS or op in HEAVY_OPS else "invalid"
+        self.histograms.setdefault(label, LatencyHistogram()).observe((time.perf_counter() - started) * 1000)
+        return response
+
+    async def _execute(self, payload: dict) -> dict:
+        try:
+            if payload.get("op") in HEAVY_OPS:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, handle_request, payload)
+            else:
+                result = handle_request(payload)
+            return {"ok": True, "result": result}
+        except Exception as e:  # Report to the client; never take the daemon down
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "pool": self.pool,
+            "inflight": len(self.inflight),
+            "coalesced": self.coalesced,
+            "result_cache": search_cache_info(),
+            "ops": {op: hist.snapshot() for op, hist in sorted(self.histograms.items())},
+        }
+
+    async def handle_client(self, reader, writer):
+        """Answer each request line in order; clients may pipeline several lines"""
+        try:
+            while not self.stopped.is_set():
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    payload = json.loads(line)
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e}"}
+                else:
+                    if isinstance(payload, dict):
+                        response = await self.dispatch(payload)
+                    else:
+                        response = {"ok": False, "error": "Expected a JSON object"}
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, socket_path: str):
+        self.stopped = asyncio.Event()
+        server = await asyncio.start_unix_server(self.handle_client, path=socket_path, limit=1 << 24)
+        os.chmod(socket_path, 0o600)
+        print(f"UI Pro Max search daemon listening on {socket_path} ({self.pool} pool)", flush=True)
+        async with server:
+            await self.stopped.wait()
+
+
+def serve(socket_path: str = None, workers: int = None, pool: str = "process"):
+    """Warm every index and answer requests until a shutdown op (or Ctrl+C)."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix domain sockets are not available on this platform")
+    socket_path = socket_path or SOCKET_PATH
+    prepare_socket_dir(socket_path)
+    if os.path.exists(socket_path):
+        if socket_alive(socket_path):
+            raise RuntimeError(f"A search daemon is already running on {socket_path}")
+        os.unlink(socket_path)  # stale socket from a crashed daemon
+
+    build_indexes()
+    service = SearchService(workers or DEFAULT_WORKERS, pool)
+    try:
+        asyncio.run(service.run(socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown(cancel_futures=True)
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Service Client - talks to the search daemon (see service.py)
+
+Kept apart from the daemon so one-shot CLI runs only pay for json and socket:
+the asyncio server, worker pools and search modules are never imported here.
+"""
+
+import json
+import os
+import socket
+import stat
+import tempfile
+from pathlib import Path
+
+
+def _default_socket_path() -> str:
+    """$XDG_RUNTIME_DIR/uipro-search.sock, else search.sock in a per-user directory under the temp dir"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return str(Path(runtime_dir) / "uipro-search.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return str(Path(tempfile.gettempdir()) / f"uipro-{uid}" / "search.sock")
+
+
+SOCKET_PATH = os.environ.get("UIPRO_SOCKET") or _default_socket_path()
+CONNECT_TIMEOUT = 0.2
+REQUEST_TIMEOUT = 60
+
+
+def owned_by_user(path: str) -> bool:
+    """True if path itself (symlinks not followed) belongs to the current user"""
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        return os.lstat(path).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def prepare_socket_dir(socket_path: str):
+    """Create the socket's directory private to the user (0700) if missing.
+
+    Raises RuntimeError if the directory could let another user replace the
+    socket: it must belong to the user (or to root, like a sticky /tmp) and
+    must not be writable by others unless it is sticky.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    except OSError as e:
+        raise RuntimeError(f"Cannot create socket directory {directory}: {e}")
+    if not hasattr(os, "getuid"):
+        return
+    st = os.lstat(directory)
+    shared_writable = st.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and not st.st_mode & stat.S_ISVTX
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid not in (0, os.getuid()) or shared_writable:
+        raise RuntimeError(f"Refusing insecure socket directory {directory} (must be a private directory owned by you)")
+
+
+def socket_alive(path: str) -> bool:
+    """True if something is accepting connections on the socket path"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def request(payload: dict, socket_path: str = None, timeout: float = REQUEST_TIMEOUT):
+    """Send one request to the daemon.
+
+    Returns the result, or None when no daemon is reachable or its reply is
+    unreadable, so callers can fall back to in-process search; sockets owned
+    by another user are never trusted. Raises RuntimeError for daemon-side
+    errors and when the daemon accepted the request but did not answer within
+    timeout, so the caller decides (and says) whether to redo the work.
+    """
+    socket_path = socket_path or SOCKET_PATH
+    if not hasattr(socket, "AF_UNIX") or not owned_by_user(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.settimeout(timeout)
+            try:
+                sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+                with sock.makefile("rb") as f:
+                    line = f.readline()
+            except socket.timeout:
+                raise RuntimeError(f"no reply within {timeout:g}s")
+        response = json.loads(line)
+    except (OSError, ValueError):  # No daemon, dropped connection, or a truncated/garbled reply
+        return None
+    if not isinstance(response, dict):
+        return None
+
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error", "Unknown daemon error"))
+    return response.get("result")
@@ -3,25 +3,45 @@
 Skill: vulnerability-scanner
 Script: security_scan.py
 Purpose: Validate that security principles from SKILL.md are applied correctly
-Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config]
+Usage: python security_scan.py <project_path> [--scan-type all|deps|secrets|patterns|config] [--jobs N]
+                                [--cache [--cache-path PATH]] [--since <git-rev>] [--max-file-size BYTES]
 Output: JSON with validation findings
 
+Incremental scans:
+  --cache    Replay per-file findings of unchanged files from a SQLite cache
+             (default: <project>/.agent/cache/security_scan.db)
+  --since    Only scan files changed since a git revision (plus untracked files)
+
+Binary files (NUL byte in the first 8 KiB) and files over --max-file-size are
+skipped and counted in skipped_files; the size cap bounds the memory a file takes.
+
 This script verifies:
 1. Dependencies - Supply chain security (OWASP A03)
 2. Secrets - No hardcoded credentials (OWASP A04)
 3. Code Patterns - Dangerous patterns identified (OWASP A05)
 4. Configuration - Security settings validated (OWASP A02)
 """
+import abc
 import subprocess
+import hashlib
 import json
 import os
 import sys
 import re
+import sqlite3
 import argparse
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Any
 from datetime import datetime
 
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
 # Fix Windows console encoding for Unicode output
 try:
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -85,9 +105,147 @@ DANGEROUS_PATTERNS = [
     (r'yaml\.load\s*\([^)]*\)(?!\s*,\s*Loader)', "Unsafe YAML load", "high", "Deserialization risk"),
 ]
 
+# Bump when scanner logic changes in a way that alters findings for the same rules
+SCANNER_VERSION = 1
+DEFAULT_CACHE_PATH = Path(".agent") / "cache" / "security_scan.db"
+
+# File reading: larger files are skipped unread (each scanned file is held in
+# memory whole), and a NUL byte in the first BINARY_SNIFF_BYTES marks a binary
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+BINARY_SNIFF_BYTES = 8192
+
+# Parallel scans: chunks per worker (smaller chunks balance better) and the
+# per-file weight added to its size so many tiny files still get split
+CHUNKS_PER_JOB = 4
+FILE_OVERHEAD_BYTES = 4096
+
 SKIP_DIRS = {'node_modules', '.git', 'dist', 'build', '__pycache__', '.venv', 'venv', '.next'}
 CODE_EXTENSIONS = {'.js', '.ts', '.jsx', '.tsx', '.py', '.go', '.java', '.rb', '.php'}
 CONFIG_EXTENSIONS = {'.json', '.yaml', '.yml', '.toml', '.env', '.env.local', '.env.development'}
+CONFIG_FILENAMES = {'next.config.js', 'webpack.config.js', '.eslintrc.js'}
+SECURITY_HEADER_FILES = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
+
+CONFIG_ISSUES = [
+    (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
+    (r'debug\s*=\s*True', "Debug mode enabled", "high"),
+    (r'NODE_ENV.*development', "Development mode in config", "medium"),
+    (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
+    (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
+    (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
+]
+
+# Cached findings are only valid for the exact rules (and scanner logic) that produced them
+RULESET_VERSION = hashlib.sha256(json.dumps(
+    [SCANNER_VERSION, SECRET_PATTERNS, DANGEROUS_PATTERNS, CONFIG_ISSUES]
+).encode("utf-8")).hexdigest()[:16]
+
+
+# ============================================================================
+#  COMPILED MATCHERS
+# ============================================================================
+
+def _literal_alternatives(items) -> List[str]:
+    """Strings matched by a parsed (sub)pattern made only of literals or one branch of them, else []."""
+    items = list(items)
+    if all(op == sre_parse.LITERAL for op, _ in items):
+        return ["".join(chr(arg) for _, arg in items)] if items else []
+    if len(items) == 1:
+        op, arg = items[0]
+        if op == sre_parse.BRANCH:
+            branches = [_literal_alternatives(branch) for branch in arg[1]]
+            return [alt for branch in branches for alt in branch] if all(branches) else []
+        if op == sre_parse.SUBPATTERN:
+            return _literal_alternatives(arg[-1])
+    return []
+
+
+def _required_literals(pattern: str) -> List[str]:
+    """
+    ASCII literal strings of which every match of pattern contains at least one
+    (the most selective top-level choice; [] if the pattern has none).
+    """
+    choices = []
+    run = ""
+    for op, arg in sre_parse.parse(pattern):
+        if op == sre_parse.LITERAL:
+            run += chr(arg)
+            continue
+        if run:
+            choices.append([run])
+            run = ""
+        alternatives = _literal_alternatives([(op, arg)])
+        if alternatives:
+            choices.append(alternatives)
+    if run:
+        choices.append([run])
+    choices = [[alt.lower() for alt in alts] for alts in choices if all(alt.isascii() for alt in alts)]
+    # Prefer the choice whose shortest alternative is longest
+    return max(choices, key=lambda alts: min(map(len, alts)), default=[])
+
+
+# Dotted and dotless i match "i" under re.IGNORECASE but casefold differently
+_FOLD_FIXES = {0x130: "i", 0x131: "i"}
+
+
+def _fold(content: str) -> str:
+    """
+    Case-folded content: every character re.IGNORECASE matches to an ASCII
+    character becomes its lowercase form, so a lowercase literal found by
+    str.find here is exactly a case-insensitive regex hit (newlines stay put).
+    """
+    if "\u0130" in content or "\u0131" in content:
+        content = content.translate(_FOLD_FIXES)
+    return content.casefold()
+
+
+# A rule can only match where one of its required literals occurs. Python's re
+# has no fast multi-literal (or case-insensitive) scan, so the literals are
+# checked with str.find on folded content and the full rule only confirms.
+_SECRET_RULES = [(re.compile(pattern, re.IGNORECASE), _required_literals(pattern), secret_type, severity)
+                 for pattern, secret_type, severity in SECRET_PATTERNS]
+_PATTERN_RULES = [(re.compile(pattern, re.IGNORECASE), name, severity, category)
+                  for pattern, name, severity, category in DANGEROUS_PATTERNS]
+_PATTERN_LITERALS = [_required_literals(pattern) for pattern, _, _, _ in DANGEROUS_PATTERNS]
+
+_CONFIG_RULES = [(re.compile(pattern, re.IGNORECASE), issue, severity) for pattern, issue, severity in CONFIG_ISSUES]
+_NEWLINE = re.compile("\n")
+
+
+def _candidate_lines(content: str, folded: str):
+    """
+    Return ({0-based line index: indexes of DANGEROUS_PATTERNS with a required
+    literal on that line}, in line order, plus the newline offset table).
+    folded is _fold(content). Rules without a literal are candidates on every line.
+    """
+    hits = []
+    for i, literals in enumerate(_PATTERN_LITERALS):
+        if not literals or any(literal in folded for literal in literals):
+            hits.append(i)
+    if not hits:
+        return {}, []
+
+    newlines = [m.start() for m in _NEWLINE.finditer(content)]
+    folded_newlines = newlines if len(folded) == len(content) else [m.start() for m in _NEWLINE.finditer(folded)]
+    line_count = len(newlines) + (not content.endswith("\n"))
+    candidates = {}
+    for i in hits:
+        literals = _PATTERN_LITERALS[i]
+        if not literals:
+            lines = range(line_count)
+        else:
+            lines = set()
+            for literal in literals:
+                pos = folded.find(literal)
+                while pos != -1:
+                    line = bisect_left(folded_newlines, pos)
+                    lines.add(line)
+                    if line == len(folded_newlines):
+                        break
+                    # One hit per line is enough: resume on the next line
+                    pos = folded.find(literal, folded_newlines[line] + 1)
+        for line in lines:
+            candidates.setdefault(line, []).append(i)
+    return {line: candidates[line] for line in sorted(candidates)}, newlines
 
 
 # ============================================================================
@@ -178,59 +336,497 @@ def scan_dependencies(project_path: str) -> Dict[str, Any]:
     return results
 
 
-def scan_secrets(project_path: str) -> Dict[str, Any]:
+# ============================================================================
+#  FILE SCANNERS (one shared walk)
+# ============================================================================
+
+class FileScanner(abc.ABC):
     """
-    Validate no hardcoded secrets (OWASP A04).
-    Checks: API keys, tokens, passwords, cloud credentials.
+    Per-file check fed by walk_project.
+    Subscribes to files through wants(); scan() returns the findings for one
+    file's decoded content, given with its _fold() which is computed once per
+    file (without side effects, so it can run in a worker), and add() merges
+    them into the results.
+    """
+    name = ""  # Scan-type key, also the findings cache key
+    counts_files = False  # Count subscribed files in results["scanned_files"] / ["skipped_files"]
+
+    def __init__(self):
+        self.results = self.new_results()
+
+    @abc.abstractmethod
+    def new_results(self) -> Dict[str, Any]:
+        ...
+
+    @abc.abstractmethod
+    def wants(self, file: str, ext: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def scan(self, rel_path: str, content: str, folded: str) -> List[Dict[str, Any]]:
+        ...
+
+    def add(self, findings: List[Dict[str, Any]]):
+        self.results["findings"].extend(findings)
+
+    def finish(self, project_path: str) -> Dict[str, Any]:
+        return self.results
+
+
+class SecretScanner(FileScanner):
+    """Hardcoded credentials in code and config files (OWASP A04)."""
+    name = "secrets"
+    counts_files = True
+
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": "secret_scanner",
+            "findings": [],
+            "status": "[OK] No secrets detected",
+            "scanned_files": 0,
+            "skipped_files": {"binary": 0, "too_large": 0},
+            "by_severity": {"critical": 0, "high": 0, "medium": 0}
+        }
+
+    def wants(self, file: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS or ext in CONFIG_EXTENSIONS
+
+    def scan(self, rel_path: str, content: str, folded: str) -> List[Dict[str, Any]]:
+        findings = []
+        for regex, literals, secret_type, severity in _SECRET_RULES:
+            if literals and not any(literal in folded for literal in literals):
+                continue
+            matches = regex.findall(content)
+            if matches:
+                findings.append({
+                    "file": rel_path,
+                    "type": secret_type,
+                    "severity": severity,
+                    "count": len(matches)
+                })
+        return findings
+
+    def add(self, findings: List[Dict[str, Any]]):
+        super().add(findings)
+        for finding in findings:
+            self.results["by_severity"][finding["severity"]] += finding["count"]
+
+    def finish(self, project_path: str) -> Dict[str, Any]:
+        results = self.results
+        if results["by_severity"]["critical"] > 0:
+            results["status"] = "[!!] CRITICAL: Secrets exposed!"
+        elif results["by_severity"]["high"] > 0:
+            results["status"] = "[!] HIGH: Secrets found"
+        elif sum(results["by_severity"].values()) > 0:
+            results["status"] = "[?] Potential secrets detected"
+        
+        # Limit findings for output
+        results["findings"] = results["findings"][:15]
+        return results
+
+
+class PatternScanner(FileScanner):
+    """Dangerous code patterns, reported per line (OWASP A05)."""
+    name = "patterns"
+    counts_files = True
+
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": "pattern_scanner",
+            "findings": [],
+            "status": "[OK] No dangerous patterns",
+            "scanned_files": 0,
+            "skipped_files": {"binary": 0, "too_large": 0},
+            "by_category": {}
+        }
+
+    def wants(self, file: str, ext: str) -> bool:
+        return ext in CODE_EXTENSIONS
+
+    def scan(self, rel_path: str, content: str, folded: str) -> List[Dict[str, Any]]:
+        findings = []
+        if not content:
+            return findings
+        # Lines as readlines() would give them: split on (already translated) newlines only
+        candidates, newlines = _candidate_lines(content, folded)
+        for index, rule_ids in candidates.items():
+            start = newlines[index - 1] + 1 if index else 0
+            end = newlines[index] + 1 if index < len(newlines) else len(content)
+            line = content[start:end]
+            for i in rule_ids:
+                regex, name, severity, category = _PATTERN_RULES[i]
+                if regex.search(line):
+                    findings.append({
+                        "file": rel_path,
+                        "line": index + 1,
+                        "pattern": name,
+                        "severity": severity,
+                        "category": category,
+                        "snippet": line.strip()[:80]
+                    })
+        return findings
+
+    def add(self, findings: List[Dict[str, Any]]):
+        super().add(findings)
+        by_category = self.results["by_category"]
+        for finding in findings:
+            by_category[finding["category"]] = by_category.get(finding["category"], 0) + 1
+
+    def finish(self, project_path: str) -> Dict[str, Any]:
+        results = self.results
+        critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
+        high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
+        
+        if critical_count > 0:
+            results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
+        elif high_count > 0:
+            results["status"] = f"[!] HIGH: {high_count} risky patterns"
+        elif results["findings"]:
+            results["status"] = "[?] Some patterns need review"
+        
+        # Limit findings
+        results["findings"] = results["findings"][:20]
+        return results
+
+
+class ConfigScanner(FileScanner):
+    """Insecure settings in config files plus security header presence (OWASP A02)."""
+    name = "config"
+
+    def new_results(self) -> Dict[str, Any]:
+        return {
+            "tool": "config_scanner",
+            "findings": [],
+            "status": "[OK] Configuration secure",
+            "checks": {}
+        }
+
+    def wants(self, file: str, ext: str) -> bool:
+        return ext in CONFIG_EXTENSIONS or file in CONFIG_FILENAMES
+
+    def scan(self, rel_path: str, content: str, folded: str) -> List[Dict[str, Any]]:
+        findings = []
+        for regex, issue, severity in _CONFIG_RULES:
+            if regex.search(content):
+                findings.append({
+                    "file": rel_path,
+                    "issue": issue,
+                    "severity": severity
+                })
+        return findings
+
+    def finish(self, project_path: str) -> Dict[str, Any]:
+        results = self.results
+        # Check for security header configurations
+        for hf in SECURITY_HEADER_FILES:
+            hf_path = Path(project_path) / hf
+            if hf_path.exists():
+                results["checks"]["security_headers_config"] = True
+                break
+        else:
+            results["checks"]["security_headers_config"] = False
+            results["findings"].append({
+                "issue": "No security headers configuration found",
+                "severity": "medium",
+                "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
+            })
+        
+        if any(f["severity"] == "critical" for f in results["findings"]):
+            results["status"] = "[!!] CRITICAL: Configuration issues"
+        elif any(f["severity"] == "high" for f in results["findings"]):
+            results["status"] = "[!] HIGH: Configuration review needed"
+        elif results["findings"]:
+            results["status"] = "[?] Minor configuration issues"
+        return results
+
+
+# scan-type key -> file scanner
+FILE_SCANNERS = {scanner.name: scanner for scanner in (SecretScanner, PatternScanner, ConfigScanner)}
+
+
+# ============================================================================
+#  INCREMENTAL SCANNING
+# ============================================================================
+
+def file_sha256(filepath) -> str:
+    """Content hash used when a file's mtime moved but its size did not"""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FindingsCache:
+    """
+    Per-file findings of each file scanner in SQLite. A row (project root,
+    project-relative path, scanner) is replayed while the file keeps its size and mtime - or,
+    if only the mtime moved, its content hash - under the same RULESET_VERSION.
+    One database may be shared by several projects.
+    """
+
+    def __init__(self, path, project_path):
+        self.path = Path(path)
+        self.project = str(Path(project_path).resolve())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(findings)")]
+        if columns and "project" not in columns:
+            # Rows written before the cache was scoped per project are just dropped
+            self.conn.execute("DROP TABLE findings")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS findings ("
+            " project TEXT NOT NULL, path TEXT NOT NULL, scanner TEXT NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " sha256 TEXT NOT NULL, ruleset TEXT NOT NULL, findings TEXT NOT NULL,"
+            " PRIMARY KEY (project, path, scanner))"
+        )
+        self.hits = self.misses = 0
+
+    def lookup(self, rel_path: str, filepath: Path, names: List[str]):
+        """Return (cached findings per scanner or None, stat taken before any read)."""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None, None
+        rows = {
+            scanner: (size, mtime_ns, sha256, ruleset, findings)
+            for scanner, size, mtime_ns, sha256, ruleset, findings in self.conn.execute(
+                "SELECT scanner, size, mtime_ns, sha256, ruleset, findings FROM findings WHERE project = ? AND path = ?",
+                (self.project, rel_path)
+            )
+        }
+        entries = [rows.get(name) for name in names]
+        if any(e is None or e[3] != RULESET_VERSION or e[0] != stat.st_size for e in entries):
+            self.misses += 1
+            return None, stat
+        if any(e[1] != stat.st_mtime_ns for e in entries):
+            try:
+                digest = file_sha256(filepath)
+            except OSError:
+                digest = None
+            if any(e[2] != digest for e in entries):
+                self.misses += 1
+                return None, stat
+            self.conn.executemany(
+                "UPDATE findings SET mtime_ns = ? WHERE project = ? AND path = ? AND scanner = ?",
+                [(stat.st_mtime_ns, self.project, rel_path, name) for name in names]
+            )
+        self.hits += 1
+        return [json.loads(e[4]) for e in entries], stat
+
+    def store(self, rel_path: str, stat, digest: str, names: List[str], found: list):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(self.project, rel_path, name, stat.st_size, stat.st_mtime_ns, digest, RULESET_VERSION, json.dumps(findings))
+             for name, findings in zip(names, found)]
+        )
+
+    def prune(self, seen: set, names: List[str]):
+        """Drop this project's rows of these scanners for files that no longer exist (after a full walk)."""
+        stale = [
+            (self.project, path, scanner) for path, scanner in self.conn.execute(
+                "SELECT path, scanner FROM findings WHERE project = ?", (self.project,)
+            )
+            if scanner in names and path not in seen
+        ]
+        self.conn.executemany("DELETE FROM findings WHERE project = ? AND path = ? AND scanner = ?", stale)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "ruleset": RULESET_VERSION, "hits": self.hits, "misses": self.misses}
+
+
+def git_changed_files(project_path: str, since: str) -> set:
+    """Project-relative paths changed since a git revision, plus untracked (non-ignored) files."""
+    commands = [
+        ["git", "diff", "--name-only", "--relative", "-z", since, "--"],
+        ["git", "ls-files", "--others", "--exclude-standard", "-z"],
+    ]
+    changed = set()
+    for command in commands:
+        try:
+            result = subprocess.run(command, cwd=project_path, capture_output=True, text=True, timeout=60)
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            raise RuntimeError(f"git unavailable: {e}")
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"{' '.join(command)} failed")
+        changed.update(path for path in result.stdout.split("\0") if path)
+    return changed
+
+
+def _iter_files(project_path: str, scanners: List[FileScanner], only: set = None):
+    """
+    Yield (path, indexes of subscribed scanners) for every file some scanner
+    wants, in walk order (restricted to project-relative posix paths in only).
     """
-    results = {
-        "tool": "secret_scanner",
-        "findings": [],
-        "status": "[OK] No secrets detected",
-        "scanned_files": 0,
-        "by_severity": {"critical": 0, "high": 0, "medium": 0}
-    }
-    
     for root, dirs, files in os.walk(project_path):
         dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
         
         for file in files:
             ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS and ext not in CONFIG_EXTENSIONS:
+            subscribers = [i for i, scanner in enumerate(scanners) if scanner.wants(file, ext)]
+            if not subscribers:
                 continue
-                
             filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, secret_type, severity in SECRET_PATTERNS:
-                        matches = re.findall(pattern, content, re.IGNORECASE)
-                        if matches:
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "type": secret_type,
-                                "severity": severity,
-                                "count": len(matches)
-                            })
-                            results["by_severity"][severity] += len(matches)
-                            
-            except Exception:
-                pass
-    
-    if results["by_severity"]["critical"] > 0:
-        results["status"] = "[!!] CRITICAL: Secrets exposed!"
-    elif results["by_severity"]["high"] > 0:
-        results["status"] = "[!] HIGH: Secrets found"
-    elif sum(results["by_severity"].values()) > 0:
-        results["status"] = "[?] Potential secrets detected"
-    
-    # Limit findings for output
-    results["findings"] = results["findings"][:15]
-    
-    return results
+            if only is not None and filepath.relative_to(project_path).as_posix() not in only:
+                continue
+            yield filepath, subscribers
+
+
+def _decode(data: bytes) -> str:
+    """Text exactly as open(..., encoding='utf-8', errors='ignore').read() gives it (universal newlines)."""
+    return data.decode('utf-8', 'ignore').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _scan_file(project_path: str, scanners: List[FileScanner], filepath: Path, subscribers: List[int],
+               digest: bool = False, max_file_size: int = DEFAULT_MAX_FILE_SIZE):
+    """
+    Read, decode and fold one file once and return (findings of each
+    subscribed scanner or None if it cannot be read or is skipped, content
+    sha256 when digest is set, skip reason "binary"/"too_large" or None).
+    """
+    try:
+        rel_path = str(filepath.relative_to(project_path))
+        with open(filepath, 'rb') as f:
+            if max_file_size and os.fstat(f.fileno()).st_size > max_file_size:
+                return None, None, "too_large"
+            if b"\0" in f.read(BINARY_SNIFF_BYTES):
+                return None, None, "binary"
+            f.seek(0)
+            data = f.read()
+        content = _decode(data)
+        folded = _fold(content)
+    except Exception:
+        return None, None, None
+    
+    found = []
+    for i in subscribers:
+        try:
+            found.append(scanners[i].scan(rel_path, content, folded))
+        except Exception:
+            found.append([])
+    return found, hashlib.sha256(data).hexdigest() if digest else None, None
+
+
+def _scan_chunk(project_path: str, scanner_types: list, chunk: list, digest: bool = False,
+                max_file_size: int = DEFAULT_MAX_FILE_SIZE) -> list:
+    """Worker entry point: _scan_file for every (path, subscribers) of a chunk, in order."""
+    scanners = [scanner_type() for scanner_type in scanner_types]
+    return [_scan_file(project_path, scanners, filepath, subscribers, digest, max_file_size)
+            for filepath, subscribers in chunk]
+
+
+def _chunk_by_size(files: list, count: int) -> List[list]:
+    """Split files into about count contiguous chunks of similar total size (walk order is kept)."""
+    sizes = []
+    for filepath, _ in files:
+        try:
+            sizes.append(os.path.getsize(filepath) + FILE_OVERHEAD_BYTES)
+        except OSError:
+            sizes.append(FILE_OVERHEAD_BYTES)
+    target = sum(sizes) / max(count, 1)
+    
+    chunks, chunk, chunk_size = [], [], 0
+    for entry, size in zip(files, sizes):
+        chunk.append(entry)
+        chunk_size += size
+        if chunk_size >= target:
+            chunks.append(chunk)
+            chunk, chunk_size = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _scan_parallel(project_path: str, scanners: List[FileScanner], files: list, jobs: int, digest: bool = False,
+                   max_file_size: int = DEFAULT_MAX_FILE_SIZE):
+    """Yield _scan_file results for files from a process pool, in walk order."""
+    chunks = _chunk_by_size(files, jobs * CHUNKS_PER_JOB)
+    scanner_types = [type(scanner) for scanner in scanners]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for results in executor.map(_scan_chunk, repeat(project_path), repeat(scanner_types), chunks,
+                                    repeat(digest), repeat(max_file_size)):
+            yield from results
+
+
+def walk_project(project_path: str, scanners: List[FileScanner], jobs: int = 1,
+                 cache: FindingsCache = None, only: set = None,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Walk the project once, reading each file at most once and handing its
+    content to every scanner that wants it. Returns each scanner's results.
+    
+    With jobs > 1 files are scanned in a process pool (chunked by size) and
+    merged back in walk order, so results match a sequential scan exactly.
+    With a cache, unchanged files replay their stored findings unread. only
+    restricts the walk to those project-relative paths. Binaries and files
+    over max_file_size (0 = no limit) are skipped.
+    """
+    def record(subscribers, found, skipped=None):
+        for i in subscribers:
+            if not scanners[i].counts_files:
+                continue
+            if skipped:
+                scanners[i].results["skipped_files"][skipped] += 1
+            else:
+                scanners[i].results["scanned_files"] += 1
+        if found is not None:
+            for i, findings in zip(subscribers, found):
+                scanners[i].add(findings)
+    
+    files = _iter_files(project_path, scanners, only)
+    if cache is None and jobs <= 1:
+        for filepath, subscribers in files:
+            file_found, _, skipped = _scan_file(project_path, scanners, filepath, subscribers, False, max_file_size)
+            record(subscribers, file_found, skipped)
+        return [scanner.finish(project_path) for scanner in scanners]
+    
+    files = list(files)
+    found = [None] * len(files)
+    skips = [None] * len(files)
+    keys = [None] * len(files)  # (relative path, stat, scanner names) for cache stores
+    pending = []
+    for idx, (filepath, subscribers) in enumerate(files):
+        if cache is not None:
+            rel_path = str(filepath.relative_to(project_path))
+            names = [scanners[i].name for i in subscribers]
+            found[idx], stat = cache.lookup(rel_path, filepath, names)
+            keys[idx] = (rel_path, stat, names)
+        if found[idx] is None:
+            pending.append(idx)
+    
+    pending_files = [files[idx] for idx in pending]
+    digest = cache is not None
+    if jobs > 1:
+        results = _scan_parallel(project_path, scanners, pending_files, jobs, digest, max_file_size)
+    else:
+        results = (_scan_file(project_path, scanners, filepath, subscribers, digest, max_file_size)
+                   for filepath, subscribers in pending_files)
+    for idx, (file_found, file_digest, skipped) in zip(pending, results):
+        found[idx] = file_found
+        skips[idx] = skipped
+        if cache is not None and file_found is not None and keys[idx][1] is not None:
+            rel_path, stat, names = keys[idx]
+            cache.store(rel_path, stat, file_digest, names, file_found)
+    
+    for (filepath, subscribers), file_found, skipped in zip(files, found, skips):
+        record(subscribers, file_found, skipped)
+    if cache is not None and only is None:
+        cache.prune({key[0] for key in keys}, [scanner.name for scanner in scanners])
+    
+    return [scanner.finish(project_path) for scanner in scanners]
+
+
+def scan_secrets(project_path: str) -> Dict[str, Any]:
+    """
+    Validate no hardcoded secrets (OWASP A04).
+    Checks: API keys, tokens, passwords, cloud credentials.
+    """
+    return walk_project(project_path, [SecretScanner()])[0]
 
 
 def scan_code_patterns(project_path: str) -> Dict[str, Any]:
@@ -238,59 +834,7 @@ def scan_code_patterns(project_path: str) -> Dict[str, Any]:
     Validate dangerous code patterns (OWASP A05).
     Checks: Injection risks, XSS, unsafe deserialization.
     """
-    results = {
-        "tool": "pattern_scanner",
-        "findings": [],
-        "status": "[OK] No dangerous patterns",
-        "scanned_files": 0,
-        "by_category": {}
-    }
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CODE_EXTENSIONS:
-                continue
-                
-            filepath = Path(root) / file
-            results["scanned_files"] += 1
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    lines = f.readlines()
-                    
-                    for line_num, line in enumerate(lines, 1):
-                        for pattern, name, severity, category in DANGEROUS_PATTERNS:
-                            if re.search(pattern, line, re.IGNORECASE):
-                                results["findings"].append({
-                                    "file": str(filepath.relative_to(project_path)),
-                                    "line": line_num,
-                                    "pattern": name,
-                                    "severity": severity,
-                                    "category": category,
-                                    "snippet": line.strip()[:80]
-                                })
-                                results["by_category"][category] = results["by_category"].get(category, 0) + 1
-                                
-            except Exception:
-                pass
-    
-    critical_count = sum(1 for f in results["findings"] if f["severity"] == "critical")
-    high_count = sum(1 for f in results["findings"] if f["severity"] == "high")
-    
-    if critical_count > 0:
-        results["status"] = f"[!!] CRITICAL: {critical_count} dangerous patterns"
-    elif high_count > 0:
-        results["status"] = f"[!] HIGH: {high_count} risky patterns"
-    elif results["findings"]:
-        results["status"] = "[?] Some patterns need review"
-    
-    # Limit findings
-    results["findings"] = results["findings"][:20]
-    
-    return results
+    return walk_project(project_path, [PatternScanner()])[0]
 
 
 def scan_configuration(project_path: str) -> Dict[str, Any]:
@@ -298,79 +842,22 @@ def scan_configuration(project_path: str) -> Dict[str, Any]:
     Validate security configuration (OWASP A02).
     Checks: Security headers, CORS, debug modes.
     """
-    results = {
-        "tool": "config_scanner",
-        "findings": [],
-        "status": "[OK] Configuration secure",
-        "checks": {}
-    }
-    
-    # Check common config files for issues
-    config_issues = [
-        (r'"DEBUG"\s*:\s*true', "Debug mode enabled", "high"),
-        (r'debug\s*=\s*True', "Debug mode enabled", "high"),
-        (r'NODE_ENV.*development', "Development mode in config", "medium"),
-        (r'"CORS_ALLOW_ALL".*true', "CORS allow all origins", "high"),
-        (r'"Access-Control-Allow-Origin".*\*', "CORS wildcard", "high"),
-        (r'allowCredentials.*true.*origin.*\*', "Dangerous CORS combo", "critical"),
-    ]
-    
-    for root, dirs, files in os.walk(project_path):
-        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
-        
-        for file in files:
-            ext = Path(file).suffix.lower()
-            if ext not in CONFIG_EXTENSIONS and file not in ['next.config.js', 'webpack.config.js', '.eslintrc.js']:
-                continue
-                
-            filepath = Path(root) / file
-            
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    for pattern, issue, severity in config_issues:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            results["findings"].append({
-                                "file": str(filepath.relative_to(project_path)),
-                                "issue": issue,
-                                "severity": severity
-                            })
-                            
-            except Exception:
-                pass
-    
-    # Check for security header configurations
-    header_files = ["next.config.js", "next.config.mjs", "middleware.ts", "nginx.conf"]
-    for hf in header_files:
-        hf_path = Path(project_path) / hf
-        if hf_path.exists():
-            results["checks"]["security_headers_config"] = True
-            break
-    else:
-        results["checks"]["security_headers_config"] = False
-        results["findings"].append({
-            "issue": "No security headers configuration found",
-            "severity": "medium",
-            "recommendation": "Configure CSP, HSTS, X-Frame-Options headers"
-        })
-    
-    if any(f["severity"] == "critical" for f in results["findings"]):
-        results["status"] = "[!!] CRITICAL: Configuration issues"
-    elif any(f["severity"] == "high" for f in results["findings"]):
-        results["status"] = "[!] HIGH: Configuration review needed"
-    elif results["findings"]:
-        results["status"] = "[?] Minor configuration issues"
-    
-    return results
+    return walk_project(project_path, [ConfigScanner()])[0]
 
 
 # ============================================================================
 #  MAIN
 # ============================================================================
 
-def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
-    """Execute security validation scans."""
+def run_full_scan(project_path: str, scan_type: str = "all", jobs: int = 1,
+                  cache_path: str = None, since: str = None,
+                  max_file_size: int = DEFAULT_MAX_FILE_SIZE) -> Dict[str, Any]:
+    """
+    Execute security validation scans (file scans use jobs worker processes).
+    cache_path enables the findings cache; since limits file scans to files
+    changed since that git revision (raises RuntimeError if git fails).
+    Files larger than max_file_size bytes (0 = no limit) are skipped.
+    """
     
     report = {
         "project": project_path,
@@ -391,21 +878,46 @@ def run_full_scan(project_path: str, scan_type: str = "all") -> Dict[str, Any]:
         "patterns": ("code_patterns", scan_code_patterns),
         "config": ("configuration", scan_configuration),
     }
-    
-    for key, (name, scanner) in scanners.items():
-        if scan_type == "all" or scan_type == key:
-            result = scanner(project_path)
-            report["scans"][name] = result
-            
-            findings_count = len(result.get("findings", []))
-            report["summary"]["total_findings"] += findings_count
-            
-            for finding in result.get("findings", []):
-                sev = finding.get("severity", "low")
-                if sev == "critical":
-                    report["summary"]["critical"] += 1
-                elif sev == "high":
-                    report["summary"]["high"] += 1
+    selected = [key for key in scanners if scan_type == "all" or scan_type == key]
+    
+    # Every selected file scanner shares a single walk of the project
+    file_keys = [key for key in selected if key in FILE_SCANNERS]
+    file_results = {}
+    if file_keys:
+        only = git_changed_files(project_path, since) if since else None
+        cache = None
+        if cache_path:
+            try:
+                cache = FindingsCache(cache_path, project_path)
+            except (OSError, sqlite3.Error) as e:
+                # An unusable cache only costs speed: scan everything without it
+                report["cache"] = {"path": str(cache_path), "error": str(e)}
+        try:
+            file_results = dict(zip(file_keys, walk_project(
+                project_path, [FILE_SCANNERS[key]() for key in file_keys], jobs, cache, only, max_file_size
+            )))
+        finally:
+            if cache is not None:
+                cache.close()
+        if only is not None:
+            report["since"] = {"revision": since, "changed_files": len(only)}
+        if cache is not None:
+            report["cache"] = cache.stats()
+    
+    for key in selected:
+        name, scanner = scanners[key]
+        result = file_results[key] if key in file_results else scanner(project_path)
+        report["scans"][name] = result
+        
+        findings_count = len(result.get("findings", []))
+        report["summary"]["total_findings"] += findings_count
+        
+        for finding in result.get("findings", []):
+            sev = finding.get("severity", "low")
+            if sev == "critical":
+                report["summary"]["critical"] += 1
+            elif sev == "high":
+                report["summary"]["high"] += 1
     
     # Determine overall status
     if report["summary"]["critical"] > 0:
@@ -427,6 +939,16 @@ def main():
                         default="all", help="Type of scan to run")
     parser.add_argument("--output", choices=["json", "summary"], default="json",
                         help="Output format")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for file scanning (default: 1)")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"Reuse findings of unchanged files (default cache: <project>/{DEFAULT_CACHE_PATH.as_posix()})")
+    parser.add_argument("--cache-path", type=str, default=None,
+                        help="Findings cache database (implies --cache)")
+    parser.add_argument("--since", type=str, default=None,
+                        help="Only scan files changed since this git revision (plus untracked files)")
+    parser.add_argument("--max-file-size", type=int, default=DEFAULT_MAX_FILE_SIZE,
+                        help=f"Skip files larger than this many bytes (default: {DEFAULT_MAX_FILE_SIZE}, 0 = no limit)")
     
     args = parser.parse_args()
     
@@ -434,7 +956,16 @@ def main():
         print(json.dumps({"error": f"Directory not found: {args.project_path}"}))
         sys.exit(1)
     
-    result = run_full_scan(args.project_path, args.scan_type)
+    cache_path = args.cache_path
+    if args.cache and not cache_path:
+        cache_path = str(Path(args.project_path) / DEFAULT_CACHE_PATH)
+    
+    try:
+        result = run_full_scan(args.project_path, args.scan_type, args.jobs, cache_path, args.since,
+                               args.max_file_size)
+    except RuntimeError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
     
     if args.output == "summary":
         print(f"\n{'='*60}")